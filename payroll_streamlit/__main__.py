@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app's modules import each other by plain name, as when Streamlit runs main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from payroll_cli import main
+
+sys.exit(main())
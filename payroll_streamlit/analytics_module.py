@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from connection import session_scope
+from cache_versions import current_version
+from attendance_bitmap import ATTENDANCE_SCOPE
+from directory_cache import DIRECTORY_SCOPE
+from payroll_engine import compute_payslips
+from salary_rules import load_rules
+from workday_calendar import HOLIDAY_SCOPE, month_calendars
+
+TREND_LENGTHS = [12, 24]
+MAX_CACHED_DASHBOARDS = 64
+
+# Employees x months grouped by everything a payslip depends on: department,
+# salary and present workdays. Present workdays are counted in SQL with a 32-bit
+# SWAR popcount of (present_mask & workday_mask), one nesting level per step.
+_GROUPS_SQL = """
+WITH periods(year, month, workday_mask) AS (VALUES {periods})
+SELECT department, year, month, basic_salary, days_present, COUNT(*) AS employees
+FROM (
+    SELECT department, year, month, basic_salary,
+           (((b + (b >> 4)) & 252645135) * 16843009 >> 24) & 255 AS days_present
+    FROM (
+        SELECT department, year, month, basic_salary,
+               (a & 858993459) + ((a >> 2) & 858993459) AS b
+        FROM (
+            SELECT e.department, p.year, p.month, e.basic_salary,
+                   (COALESCE(am.present_mask, 0) & p.workday_mask)
+                   - (((COALESCE(am.present_mask, 0) & p.workday_mask) >> 1) & 1431655765) AS a
+            FROM employees e
+            CROSS JOIN periods p
+            LEFT JOIN attendance_months am
+                   ON am.employee_id = e.id AND am.year = p.year AND am.month = p.month
+            WHERE e.organization = :organization
+        )
+    )
+)
+GROUP BY department, year, month, basic_salary, days_present
+"""
+
+_lock = threading.Lock()
+_dashboards = OrderedDict()  # (organization, end, months) -> (versions, trends)
+
+def trend_months(end_year, end_month, months):
+    """The `months` (year, month) pairs ending with end_year/end_month, oldest first."""
+    index = end_year * 12 + end_month - 1
+    return [(i // 12, i % 12 + 1) for i in range(index - months + 1, index + 1)]
+
+def _period_values(periods, calendars):
+    values = ", ".join(f"(:y{i}, :m{i}, :w{i})" for i in range(len(periods)))
+    params = {}
+    for i, (year, month) in enumerate(periods):
+        params.update({f"y{i}": year, f"m{i}": month, f"w{i}": calendars[(year, month)].workday_mask})
+    return values, params
+
+def department_trends(session, organization, end_year, end_month, months=12, today=None, rules=None):
+    """Headcount, payroll cost and attendance per department and month.
+
+    One GROUP BY query returns a row per distinct (department, month, salary,
+    days present); the payslip formulas run once per row and are weighted by
+    its employee count, so totals equal summing every employee's payslip.
+    """
+    rules = rules or load_rules(session, organization)
+    periods = trend_months(end_year, end_month, months)
+    calendars = month_calendars(session, organization, periods)
+    values, params = _period_values(periods, calendars)
+    groups = pd.DataFrame(
+        session.execute(text(_GROUPS_SQL.format(periods=values)), dict(params, organization=organization)).all(),
+        columns=['department', 'year', 'month', 'basic_salary', 'days_present', 'employees'],
+    )
+    if groups.empty:
+        return pd.DataFrame(columns=['department', 'year', 'month', 'headcount', 'days_present',
+                                     'total_workdays', 'payroll_cost', 'net_pay', 'attendance_percentage'])
+
+    frames = []
+    for (year, month), group in groups.groupby(['year', 'month'], sort=True):
+        group = group.reset_index(drop=True)
+        payslips = compute_payslips(
+            pd.DataFrame({'employee_id': group.index, 'basic_salary': group['basic_salary']}),
+            group['days_present'], year, month, today=today, rules=rules, workdays=calendars[(year, month)],
+        )
+        weight = group['employees']
+        frames.append(pd.DataFrame({
+            'department': group['department'],
+            'year': year,
+            'month': month,
+            'headcount': weight,
+            'days_present': group['days_present'] * weight,
+            'total_workdays': payslips['total_workdays'] * weight,
+            'payroll_cost': payslips['gross_salary'] * weight,
+            'net_pay': payslips['net_salary'] * weight,
+        }))
+
+    trends = pd.concat(frames, ignore_index=True).groupby(
+        ['department', 'year', 'month'], as_index=False
+    ).sum()
+    workdays = trends['total_workdays'].where(trends['total_workdays'] > 0)
+    trends['attendance_percentage'] = (trends['days_present'] / workdays * 100).fillna(0.0)
+    return trends
+
+def get_department_trends(session, organization, end_year, end_month, months=12, today=None):
+    """department_trends served from memory until employees, attendance, holidays
+    or the salary rules change.
+
+    Returns (trends, cached).
+    """
+    key = (organization, end_year, end_month, months)
+    rules = load_rules(session, organization)
+    versions = (current_version(DIRECTORY_SCOPE, organization), current_version(ATTENDANCE_SCOPE, organization),
+                current_version(HOLIDAY_SCOPE, organization), rules.version)
+    with _lock:
+        cached = _dashboards.get(key)
+        if cached is not None and cached[0] == versions:
+            _dashboards.move_to_end(key)
+            return cached[1], True
+
+    trends = department_trends(session, organization, end_year, end_month, months, today=today, rules=rules)
+    with _lock:
+        _dashboards[key] = (versions, trends)
+        _dashboards.move_to_end(key)
+        while len(_dashboards) > MAX_CACHED_DASHBOARDS:
+            _dashboards.popitem(last=False)
+    return trends, False
+
+def analytics_page():
+    st.title("Analytics")
+
+    if not st.session_state.get('is_logged_in', False):
+        st.warning("Please login first in 'Login / Sign Up' tab.")
+        return
+
+    organization = st.session_state.get('organization')
+    if not organization:
+        st.error("Organization info missing. Please login again.")
+        return
+
+    today = date.today()
+    months = st.selectbox("Trend length (months)", TREND_LENGTHS, index=0)
+
+    start = time.perf_counter()
+    with session_scope(organization) as session:
+        trends, cached = get_department_trends(session, organization, today.year, today.month, months, today=today)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if trends.empty:
+        st.info("No employees found for your organization.")
+        return
+
+    trends = trends.assign(period=pd.to_datetime(dict(year=trends['year'], month=trends['month'], day=1)))
+    current = trends[trends['period'] == trends['period'].max()]
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Headcount", int(current['headcount'].sum()))
+    col2.metric("Payroll cost this month", f"₹{current['payroll_cost'].sum():,.2f}")
+    workdays = current['total_workdays'].sum()
+    col3.metric("Attendance this month", f"{current['days_present'].sum() / workdays * 100:.1f}%" if workdays else "–")
+
+    st.subheader("Headcount by department")
+    st.bar_chart(current.set_index('department')['headcount'])
+
+    st.subheader("Monthly payroll cost by department (₹)")
+    st.line_chart(trends.pivot(index='period', columns='department', values='payroll_cost'))
+
+    st.subheader("Attendance percentage by department")
+    st.line_chart(trends.pivot(index='period', columns='department', values='attendance_percentage'))
+
+    with st.expander("Figures"):
+        table = trends.assign(period=trends['period'].dt.strftime('%Y-%m'))
+        st.dataframe(table[['period', 'department', 'headcount', 'payroll_cost', 'net_pay', 'attendance_percentage']],
+                     hide_index=True)
+
+    st.caption(f"{'Served from cache' if cached else 'Computed'} in {elapsed_ms:.0f} ms.")
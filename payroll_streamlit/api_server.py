@@ -0,0 +1,339 @@
+"""Read-only JSON API over the payroll database.
+
+    PAYROLL_API_TOKEN=... python api_server.py --port 8765
+    curl -H "Authorization: Bearer $PAYROLL_API_TOKEN" \\
+        "http://127.0.0.1:8765/orgs/xyz%20public%20school/payslips?month=2026-09&limit=100"
+
+Endpoints (GET only):
+
+    /health
+    /orgs/{organization}/employees?after=&limit=
+    /orgs/{organization}/attendance?month=YYYY-MM&after=&limit=
+    /orgs/{organization}/payslips?month=YYYY-MM&after=&limit=
+
+Lists are paged by employee id: pass the returned `next_after` as `after` to
+get the next page. An organization without employees is 404 Not Found. Every response carries an ETag, and a request whose
+If-None-Match matches gets 304 Not Modified. Responses are kept in memory
+until the database files change on disk, so repeated polls of an unchanged
+database don't touch SQLite at all. When the app runs sharded
+(PAYROLL_SHARD_DIR), each organization is served from its own database.
+
+Runs on asyncio streams with a thread pool for the database, no web framework.
+Binds to 127.0.0.1 unless PAYROLL_API_HOST says otherwise. Requests need
+`Authorization: Bearer <PAYROLL_API_TOKEN>`; the server refuses to start
+without a token unless --insecure is given.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from sqlalchemy.orm import sessionmaker
+
+from connection import POOL_SIZE, database_path, make_engine
+from db_setup import Employee, AttendanceMonth
+from attendance_bitmap import popcount
+from payroll_engine import PAYSLIP_COLUMNS, run_payroll
+from workday_calendar import clear_holiday_cache, month_calendar
+
+logger = logging.getLogger("payroll.api")
+
+HOST = os.environ.get("PAYROLL_API_HOST", "127.0.0.1")
+PORT = int(os.environ.get("PAYROLL_API_PORT", "8765"))
+API_TOKEN = os.environ.get("PAYROLL_API_TOKEN")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_HEADER_BYTES = 16 * 1024
+IDLE_TIMEOUT_SECONDS = 15
+RESPONSE_CACHE_SIZE = 1024
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def _int_param(params, name, default, minimum, maximum):
+    value = params.get(name, [None])[0]
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be an integer")
+    if not minimum <= number <= maximum:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' must be between {minimum} and {maximum}")
+    return number
+
+def _month_param(params):
+    value = params.get("month", [None])[0]
+    if value is None:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "'month' is required, as YYYY-MM")
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'month' must be YYYY-MM, got {value!r}")
+    return year, month
+
+def _page(params):
+    return (_int_param(params, "after", 0, 0, 2 ** 63 - 1),
+            _int_param(params, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT))
+
+def _employee_page(session, organization, after, limit):
+    # One extra row tells whether there is a next page
+    rows = session.query(Employee.id, Employee.name, Employee.department, Employee.basic_salary).filter(
+        Employee.organization == organization,
+        Employee.id > after,
+    ).order_by(Employee.id).limit(limit + 1).all()
+    return rows[:limit], (rows[limit - 1][0] if len(rows) > limit else None)
+
+def list_employees(session, organization, params):
+    after, limit = _page(params)
+    rows, next_after = _employee_page(session, organization, after, limit)
+    items = [{"id": i, "name": n, "department": d, "basic_salary": s} for i, n, d, s in rows]
+    return {"organization": organization, "items": items, "next_after": next_after}
+
+def list_attendance(session, organization, params):
+    year, month = _month_param(params)
+    after, limit = _page(params)
+    rows, next_after = _employee_page(session, organization, after, limit)
+    ids = [row[0] for row in rows]
+    masks = dict(session.query(AttendanceMonth.employee_id, AttendanceMonth.present_mask).filter(
+        AttendanceMonth.employee_id.in_(ids),
+        AttendanceMonth.year == year,
+        AttendanceMonth.month == month,
+    ).all()) if ids else {}
+
+    workdays = month_calendar(session, organization, year, month)
+    items = []
+    for employee_id, name, _, _ in rows:
+        mask = masks.get(employee_id, 0)
+        items.append({
+            "employee_id": employee_id,
+            "name": name,
+            "present_dates": [date(year, month, d).isoformat() for d in range(1, workdays.days_in_month + 1)
+                             if mask >> (d - 1) & 1],
+            "days_present": int(popcount([mask & workdays.workday_mask])[0]),
+            "total_workdays": workdays.total_workdays,
+        })
+    return {"organization": organization, "month": f"{year}-{month:02d}", "items": items, "next_after": next_after}
+
+def list_payslips(session, organization, params):
+    year, month = _month_param(params)
+    after, limit = _page(params)
+    rows, next_after = _employee_page(session, organization, after, limit)
+    items = []
+    if rows:
+        payslips = run_payroll(session, organization, year, month, employee_ids=[row[0] for row in rows])
+        items = payslips.reindex(columns=PAYSLIP_COLUMNS).to_dict("records")
+    return {"organization": organization, "month": f"{year}-{month:02d}", "items": items, "next_after": next_after}
+
+ROUTES = [
+    (re.compile(r"^/orgs/(?P<organization>[^/]+)/employees$"), list_employees),
+    (re.compile(r"^/orgs/(?P<organization>[^/]+)/attendance$"), list_attendance),
+    (re.compile(r"^/orgs/(?P<organization>[^/]+)/payslips$"), list_payslips),
+]
+
+def _json_default(value):
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class PayrollApi:
+    """Routes requests to handlers and caches their JSON until the database changes."""
+
+    def __init__(self, db_path=None, pool_size=POOL_SIZE, token=API_TOKEN):
+        self.db_path = db_path  # None: each organization's own database
+        self.pool_size = pool_size
+        self.token = token
+        self._databases = {}  # path -> (engine, sessionmaker)
+        # As many threads as pooled connections, so a request never waits on the pool
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="payroll-api")
+        self._cache = OrderedDict()  # target -> (fingerprint, etag, body)
+        self._fingerprints = {}  # path -> last fingerprint seen
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for engine, _ in self._databases.values():
+            engine.dispose()
+
+    def database(self, organization):
+        """(path, sessionmaker) of the database holding an organization's data."""
+        path = self.db_path or database_path(organization, create=False)
+        if path is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"unknown organization {organization!r}")
+        with self._lock:
+            entry = self._databases.get(path)
+            if entry is None:
+                engine = make_engine(path, readonly=True, pool_size=self.pool_size, max_overflow=0)
+                entry = self._databases[path] = (engine, sessionmaker(bind=engine))
+        return path, entry[1]
+
+    def fingerprint(self, db_path):
+        """Changes whenever a write is committed (WAL appends) or checkpointed, and
+        daily, since payslips depend on whether their month has ended."""
+        stamps = [date.today()]
+        for path in (db_path, db_path + "-wal"):
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _render(self, Session, handler, organization, params):
+        session = Session()
+        try:
+            if session.query(Employee.id).filter(Employee.organization == organization).first() is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"unknown organization {organization!r}")
+            payload = handler(session, organization, params)
+        finally:
+            session.close()
+        body = json.dumps(payload, default=_json_default, separators=(",", ":")).encode("utf-8")
+        return f'"{hashlib.sha256(body).hexdigest()[:32]}"', body
+
+    async def respond(self, method, target, headers):
+        """Return (status, extra_headers, body) for one request."""
+        if method != "GET":
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "only GET is supported")
+        if self.token:
+            supplied = headers.get("authorization", "")
+            if not hmac.compare_digest(supplied.encode(), f"Bearer {self.token}".encode()):
+                raise ApiError(HTTPStatus.UNAUTHORIZED, "missing or invalid bearer token")
+
+        url = urlsplit(target)
+        if url.path == "/health":
+            return HTTPStatus.OK, {}, b'{"status":"ok"}'
+        for pattern, handler in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no route for {url.path}")
+        organization = unquote(match.group("organization"))
+        params = parse_qs(url.query)
+
+        db_path, Session = self.database(organization)
+        fingerprint = self.fingerprint(db_path)
+        with self._lock:
+            if fingerprint != self._fingerprints.get(db_path):
+                # Holidays may have been edited by the app, whose version bumps this process cannot see
+                clear_holiday_cache()
+                self._fingerprints[db_path] = fingerprint
+            cached = self._cache.get(target)
+        if cached is not None and cached[0] == fingerprint:
+            etag, body = cached[1], cached[2]
+        else:
+            loop = asyncio.get_running_loop()
+            etag, body = await loop.run_in_executor(self.executor, self._render, Session, handler, organization, params)
+            with self._lock:
+                self._cache[target] = (fingerprint, etag, body)
+                self._cache.move_to_end(target)
+                while len(self._cache) > RESPONSE_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            return HTTPStatus.NOT_MODIFIED, {"ETag": etag}, b""
+        return HTTPStatus.OK, {"ETag": etag, "Cache-Control": "no-cache"}, body
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT_SECONDS)
+                except asyncio.TimeoutError:
+                    return
+                if not request_line:
+                    return
+                headers, size = {}, len(request_line)
+                while True:
+                    line = await reader.readline()
+                    size += len(line)
+                    if size > MAX_HEADER_BYTES:
+                        await self._send(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, {}, b"", close=True)
+                        return
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, HTTPStatus.BAD_REQUEST, {}, b"", close=True)
+                    return
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+
+                try:
+                    status, extra, body = await self.respond(method, target, headers)
+                except ApiError as e:
+                    status, extra = e.status, {}
+                    body = json.dumps({"error": e.message}).encode("utf-8")
+                except Exception:
+                    logger.exception("Request failed: %s %s", method, target)
+                    status, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {}
+                    body = b'{"error":"internal server error"}'
+                await self._send(writer, status, extra, body, close=not keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status, extra, body, close):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if body:
+            lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.extend(f"{name}: {value}" for name, value in extra.items())
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(api, host=HOST, port=PORT, ready=None):
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname())
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve payroll data as read-only JSON.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", help="SQLite database to serve (defaults to the app's, or each organization's when sharded)")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE, help="database connections and worker threads")
+    parser.add_argument("--insecure", action="store_true", help="serve without a bearer token (PAYROLL_API_TOKEN unset)")
+    args = parser.parse_args(argv)
+    if not API_TOKEN and not args.insecure:
+        parser.error("PAYROLL_API_TOKEN is not set; set it, or pass --insecure to serve without authentication")
+
+    api = PayrollApi(args.db, pool_size=args.pool_size)
+    try:
+        asyncio.run(serve(api, args.host, args.port, ready=lambda bound: print(f"Payroll API listening on http://{bound[0]}:{bound[1]}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
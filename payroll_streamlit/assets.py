@@ -0,0 +1,43 @@
+import os
+import base64
+import hashlib
+import mimetypes
+from collections import namedtuple
+from functools import lru_cache
+
+import streamlit as st
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Streamlit serves this folder at app/static/ when server.enableStaticServing is on
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+
+LOGO = "tp2-removebg-preview.png"
+BACKGROUND = "background.jpg"
+
+Asset = namedtuple("Asset", ["name", "mime", "digest", "data"])
+
+@lru_cache(maxsize=None)
+def load_asset(name):
+    """Read a static asset once per process. Returns None if the file is missing."""
+    path = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as asset_file:
+        data = asset_file.read()
+    mime = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return Asset(name, mime, hashlib.sha256(data).hexdigest()[:12], data)
+
+@lru_cache(maxsize=None)
+def _data_uri(name):
+    asset = load_asset(name)
+    return f"data:{asset.mime};base64,{base64.b64encode(asset.data).decode()}"
+
+def asset_url(name):
+    """URL for an asset: a content-hashed static link when static serving is
+    enabled, otherwise a data URI that is encoded only once per process."""
+    asset = load_asset(name)
+    if asset is None:
+        return None
+    if st.get_option("server.enableStaticServing"):
+        return f"app/static/{name}?v={asset.digest}"
+    return _data_uri(name)
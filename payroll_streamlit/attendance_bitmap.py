@@ -0,0 +1,126 @@
+import calendar
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from cache_versions import bump_version
+from db_setup import Employee, AttendanceMonth
+
+ATTENDANCE_SCOPE = "attendance"
+
+# Days present in the new rows are set, days absent are cleared, the rest kept
+_UPSERT_SQL = text(
+    "INSERT INTO attendance_months (employee_id, year, month, present_mask) "
+    "VALUES (:employee_id, :year, :month, :set_bits) "
+    "ON CONFLICT (employee_id, year, month) "
+    "DO UPDATE SET present_mask = (present_mask & ~:clear_bits) | :set_bits"
+)
+
+def day_bit(day):
+    return 1 << (day.day - 1)
+
+def popcount(masks):
+    """Number of set bits of each value in an integer array."""
+    masks = np.asarray(masks, dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(masks).astype(np.int64)
+    # NumPy < 2.0: count bits per byte with a lookup table
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+    return sum(table[(masks >> shift) & 0xFF] for shift in (0, 8, 16, 24))
+
+def mask_to_days(masks, days_in_month):
+    """Expand masks into a (len(masks), days_in_month) boolean matrix."""
+    masks = np.asarray(masks, dtype=np.int64).reshape(-1, 1)
+    return ((masks >> np.arange(days_in_month)) & 1).astype(bool)
+
+def apply_attendance_changes(session, rows):
+    """Fold attendance rows (dicts with employee_id, date, is_present) into the
+    monthly bitmaps with one upsert per affected (employee, month)."""
+    set_bits = defaultdict(int)
+    clear_bits = defaultdict(int)
+    for row in rows:
+        key = (row['employee_id'], row['date'].year, row['date'].month)
+        bit = day_bit(row['date'])
+        if row['is_present']:
+            set_bits[key] |= bit
+            clear_bits[key] &= ~bit
+        else:
+            clear_bits[key] |= bit
+            set_bits[key] &= ~bit
+    if not set_bits and not clear_bits:
+        return
+
+    params = [
+        {'employee_id': e, 'year': y, 'month': m, 'set_bits': set_bits[(e, y, m)], 'clear_bits': clear_bits[(e, y, m)]}
+        for (e, y, m) in set(set_bits) | set(clear_bits)
+    ]
+    session.execute(_UPSERT_SQL, params)
+
+def load_month_masks(session, organization, year, month, employee_ids=None):
+    """Present-day bitmasks of an organization's employees for one month, as a
+    Series indexed by employee id (employees without a row are absent)."""
+    query = session.query(AttendanceMonth.employee_id, AttendanceMonth.present_mask).join(
+        Employee, Employee.id == AttendanceMonth.employee_id
+    ).filter(
+        Employee.organization == organization,
+        AttendanceMonth.year == year,
+        AttendanceMonth.month == month,
+    )
+    if employee_ids is not None:
+        query = query.filter(AttendanceMonth.employee_id.in_(list(employee_ids)))
+    return pd.Series(dict(query.all()), dtype='int64', name='present_mask')
+
+def month_attendance_map(session, employee_id, year, month):
+    """{date: True} for the days an employee was present in a month."""
+    mask = session.query(AttendanceMonth.present_mask).filter_by(
+        employee_id=employee_id, year=year, month=month
+    ).scalar() or 0
+    days_in_month = calendar.monthrange(year, month)[1]
+    return {date(year, month, d): True for d in range(1, days_in_month + 1) if mask & (1 << (d - 1))}
+
+def invalidate_attendance(organization):
+    """Call after committing attendance changes for an organization."""
+    bump_version(ATTENDANCE_SCOPE, organization)
+
+def delete_employee_bitmaps(session, employee_id):
+    session.query(AttendanceMonth).filter(AttendanceMonth.employee_id == employee_id).delete(synchronize_session=False)
+
+# (employee_id, year, month, present_mask) of every month as recorded in the daily rows
+_DAILY_MASKS_SQL = (
+    "SELECT employee_id, CAST(strftime('%Y', date) AS INTEGER) AS year, "
+    "CAST(strftime('%m', date) AS INTEGER) AS month, "
+    "SUM(CASE WHEN is_present THEN 1 << (CAST(strftime('%d', date) AS INTEGER) - 1) ELSE 0 END) AS present_mask "
+    "FROM attendances WHERE true GROUP BY 1, 2, 3"
+)
+
+def find_bitmap_drift(conn):
+    """Months whose bitmap disagrees with the daily attendance rows, as
+    (employee_id, year, month, bitmap_mask, daily_mask) tuples."""
+    return [tuple(row) for row in conn.exec_driver_sql(
+        f"WITH daily AS ({_DAILY_MASKS_SQL}) "
+        "SELECT d.employee_id, d.year, d.month, COALESCE(m.present_mask, 0), d.present_mask FROM daily d "
+        "LEFT JOIN attendance_months m "
+        "ON m.employee_id = d.employee_id AND m.year = d.year AND m.month = d.month "
+        "WHERE COALESCE(m.present_mask, 0) != d.present_mask "
+        "UNION ALL "
+        "SELECT m.employee_id, m.year, m.month, m.present_mask, 0 FROM attendance_months m "
+        "WHERE m.present_mask != 0 AND (m.employee_id, m.year, m.month) NOT IN "
+        "(SELECT employee_id, year, month FROM daily) "
+        "ORDER BY 1, 2, 3"
+    )]
+
+def rebuild_bitmaps(conn):
+    """(Re)build every monthly bitmap from the daily attendance table, which is
+    authoritative; bitmaps of months without daily rows are removed."""
+    conn.exec_driver_sql(
+        f"DELETE FROM attendance_months WHERE (employee_id, year, month) NOT IN "
+        f"(SELECT employee_id, year, month FROM ({_DAILY_MASKS_SQL}))"
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO attendance_months (employee_id, year, month, present_mask) "
+        f"{_DAILY_MASKS_SQL} "
+        "ON CONFLICT (employee_id, year, month) DO UPDATE SET present_mask = excluded.present_mask"
+    )
@@ -1,10 +1,17 @@
 import streamlit as st 
-from connection import get_session
-from sqlalchemy import func
-from db_setup import Employee, Attendance
-from datetime import datetime
+from connection import session_scope
+from sqlalchemy import func, and_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from db_setup import Employee, Attendance, AttendanceMonth
+from attendance_bitmap import (apply_attendance_changes, day_bit, delete_employee_bitmaps, invalidate_attendance, mask_to_days,
+                               month_attendance_map)
+from payslip_ledger import mark_months_dirty, mark_organization_dirty, delete_employee_payslips
+from directory_cache import get_directory, find_employee, invalidate_directory
+from workday_calendar import (add_holiday, build_month, calendar_weeks, delete_holiday, invalidate_holidays,
+                              is_holiday, is_workday, list_holidays, month_calendar)
+from datetime import datetime, date
+import numpy as np
 import pandas as pd
-import calendar
 
 def mark_attendance(session, employee_name, date, is_present, organization):
     employee = session.query(Employee).filter_by(name=employee_name, organization=organization).first()
@@ -19,24 +26,148 @@ def mark_attendance(session, employee_name, date, is_present, organization):
     else:
         attendance_record = Attendance(employee_id=employee.id, date=date, is_present=is_present)
         session.add(attendance_record)
+    apply_attendance_changes(session, [{'employee_id': employee.id, 'date': date, 'is_present': is_present}])
+    mark_months_dirty(session, [(employee.id, date.year, date.month)])
 
     try:
         session.commit()
+        invalidate_attendance(organization)
     except Exception as e:
         session.rollback()
         st.error(f"Failed to mark attendance: {e}")
 
+def upsert_attendance(session, rows):
+    """Insert or update many attendance rows in a single statement.
+
+    `rows` are dicts with `employee_id`, `date` and `is_present`. The monthly
+    bitmaps are updated to match and stored payslips of the affected months are
+    marked dirty. Nothing is committed; the caller owns the transaction.
+    """
+    if not rows:
+        return 0
+    stmt = sqlite_insert(Attendance)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attendance.employee_id, Attendance.date],
+        set_={'is_present': stmt.excluded.is_present},
+    )
+    session.execute(stmt, rows)
+    apply_attendance_changes(session, rows)
+    mark_months_dirty(session, {(r['employee_id'], r['date'].year, r['date'].month) for r in rows})
+    return len(rows)
+
+def save_attendance_bulk(session, employee_name, organization, day_values, attendance_map):
+    """Save a month of attendance for one employee in one transaction.
+
+    Only days whose value differs from `attendance_map` (as loaded for the
+    page) are written. Returns the number of changed days, or None on error.
+    """
+    employee_id = session.query(Employee.id).filter_by(name=employee_name, organization=organization).scalar()
+    if employee_id is None:
+        st.error("Employee not found in the database.")
+        return None
+
+    changes = [
+        {'employee_id': employee_id, 'date': day, 'is_present': bool(is_present)}
+        for day, is_present in day_values.items()
+        if bool(is_present) != attendance_map.get(day, False)
+    ]
+
+    try:
+        upsert_attendance(session, changes)
+        session.commit()
+        invalidate_attendance(organization)
+    except Exception as e:
+        session.rollback()
+        st.error(f"Failed to save attendance: {e}")
+        return None
+    return len(changes)
+
+def department_day_attendance(session, organization, department, day):
+    """Attendance of every employee of a department on one day, from a single
+    query on the monthly bitmaps. Returns a DataFrame indexed by employee id
+    with Name and Present columns."""
+    rows = session.query(Employee.id, Employee.name, AttendanceMonth.present_mask).outerjoin(AttendanceMonth, and_(
+        AttendanceMonth.employee_id == Employee.id,
+        AttendanceMonth.year == day.year,
+        AttendanceMonth.month == day.month,
+    )).filter(
+        Employee.organization == organization,
+        Employee.department == department,
+    ).order_by(Employee.name, Employee.id).all()
+
+    bit = day_bit(day)
+    return pd.DataFrame(
+        {"Name": [name for _, name, _ in rows], "Present": [bool((mask or 0) & bit) for _, _, mask in rows]},
+        index=pd.Index([employee_id for employee_id, _, _ in rows], name="employee_id"),
+    )
+
+def save_department_day(session, organization, day, loaded, edited):
+    """Save one day of attendance for many employees in one transaction.
+
+    Only rows whose Present value in `edited` differs from `loaded` (as shown
+    in the grid) are written. Returns the number of changes, or None on error.
+    """
+    changed = edited["Present"].astype(bool) != loaded["Present"]
+    changes = [
+        {'employee_id': int(employee_id), 'date': day, 'is_present': bool(is_present)}
+        for employee_id, is_present in edited.loc[changed, "Present"].items()
+    ]
+    if not changes:
+        return 0
+
+    try:
+        upsert_attendance(session, changes)
+        session.commit()
+        invalidate_attendance(organization)
+    except Exception as e:
+        session.rollback()
+        st.error(f"Failed to save attendance: {e}")
+        return None
+    return len(changes)
+
+def department_day_section(session, organization, employees):
+    departments = sorted({emp.department for emp in employees})
+    col1, col2 = st.columns(2)
+    department = col1.selectbox("Department", departments)
+    day = col2.date_input("Date", value=datetime.today().date())
+
+    month_cal = month_calendar(session, organization, day.year, day.month)
+    if not is_workday(month_cal, day):
+        reason = "a holiday" if is_holiday(month_cal, day) else "not a workday"
+        st.info(f"{day.strftime('%A, %d %B %Y')} is {reason}.")
+        return
+
+    loaded = department_day_attendance(session, organization, department, day)
+    st.write(f"Mark attendance for **{department}** on **{day.strftime('%d %B %Y')}** "
+             f"({len(loaded)} employees, {int(loaded['Present'].sum())} present)")
+    edited = st.data_editor(
+        loaded,
+        key=f"day_grid_{department}_{day.isoformat()}",
+        hide_index=True,
+        disabled=["Name"],
+        column_config={"Present": st.column_config.CheckboxColumn("Present")},
+        use_container_width=True,
+    )
+
+    if st.button("Save Day"):
+        changed = save_department_day(session, organization, day, loaded, edited)
+        if changed is not None:
+            st.success(f"Attendance saved for {department} on {day.strftime('%d %B %Y')} ({changed} changed).")
+
 def delete_employee(session, employee_name, organization):
     employee = session.query(Employee).filter_by(name=employee_name, organization=organization).first()
     if employee:
         try:
             # Delete all attendance records linked to this employee first
             session.query(Attendance).filter_by(employee_id=employee.id).delete()
+            delete_employee_payslips(session, employee.id)
+            delete_employee_bitmaps(session, employee.id)
             
             # Now delete the employee
             session.delete(employee)
             
             session.commit()
+            invalidate_directory(organization)
             st.success(f"Deleted employee '{employee_name}' and their attendance records successfully.")
         except Exception as e:
             session.rollback()
@@ -44,20 +175,95 @@ def delete_employee(session, employee_name, organization):
     else:
         st.error("Employee not found.")
 
-def refresh_treeview(session, selected_date, organization):
-    employees = session.query(Employee).filter_by(organization=organization).all()
-    if not employees:
+def monthly_attendance_matrix(session, organization, start_date, end_date):
+    """Build an employee x day presence matrix for a month with a single joined query.
+
+    Reads the monthly attendance bitmaps, so each employee costs one row. Returns a
+    DataFrame indexed by (employee_id, Name, Department) with one boolean column per
+    day of the month and a trailing "Present" count column.
+    """
+    rows = session.query(
+        Employee.id,
+        Employee.name,
+        Employee.department,
+        AttendanceMonth.present_mask,
+    ).outerjoin(AttendanceMonth, and_(
+        AttendanceMonth.employee_id == Employee.id,
+        AttendanceMonth.year == start_date.year,
+        AttendanceMonth.month == start_date.month,
+    )).filter(Employee.organization == organization).order_by(Employee.name, Employee.id).all()
+
+    if not rows:
+        return pd.DataFrame()
+
+    employee_ids, names, departments, masks = zip(*rows)
+    days = list(range(1, end_date.day + 1))
+    present = mask_to_days([mask or 0 for mask in masks], len(days))
+    index = pd.MultiIndex.from_arrays([employee_ids, names, departments], names=["employee_id", "Name", "Department"])
+    matrix = pd.DataFrame(present, index=index, columns=pd.Index(days, name="day"))
+    matrix["Present"] = present.sum(axis=1)
+    return matrix
+
+def refresh_treeview(session, selected_date, organization, end_date=None):
+    if end_date is None:
+        end_date = selected_date.replace(day=build_month(selected_date.year, selected_date.month).days_in_month)
+    start_date = selected_date.replace(day=1)
+
+    matrix = monthly_attendance_matrix(session, organization, start_date, end_date)
+    if matrix.empty:
         st.info("No employees found for your organization.")
         return
 
-    attendance_data = []
-    for emp in employees:
-        attendance = session.query(Attendance).filter_by(employee_id=emp.id, date=selected_date).first()
-        status = "Present" if attendance and attendance.is_present else "Absent"
-        attendance_data.append([emp.name, emp.department, status])
-
-    df = pd.DataFrame(attendance_data, columns=["Name", "Department", "Attendance"])
-    st.dataframe(df)
+    days = [c for c in matrix.columns if c != "Present"]
+    # Labels built with np.where: a bool -> str replace() crashes on some pandas 3 matrices
+    df = pd.DataFrame(
+        np.where(matrix[days].to_numpy(bool), "P", "A"),
+        index=matrix.index.droplevel("employee_id"),
+        columns=[str(day) for day in days],
+    )
+    df["Present"] = matrix["Present"].to_numpy()
+    st.dataframe(df.reset_index())
+
+def holiday_section(session, organization, year, month_num, month_cal):
+    with st.expander("Holidays"):
+        holidays = list_holidays(session, organization, year, month_num)
+        if holidays:
+            st.dataframe(pd.DataFrame([{"Date": h.date, "Holiday": h.name} for h in holidays]), hide_index=True)
+        else:
+            st.caption("No holidays declared for this month.")
+
+        first_day, last_day = date(year, month_num, 1), date(year, month_num, month_cal.days_in_month)
+        col1, col2 = st.columns(2)
+        holiday_date = col1.date_input("Holiday date", value=first_day, min_value=first_day, max_value=last_day)
+        holiday_name = col2.text_input("Holiday name")
+        add = st.button("Add Holiday")
+        remove, remove_date = False, None
+        if holidays:
+            names = {h.date: h.name for h in holidays}
+            remove_date = st.selectbox("Holiday to remove", list(names), format_func=lambda d: f"{d} ({names[d]})")
+            remove = st.button("Remove Holiday")
+
+        if add and not holiday_name.strip():
+            st.error("Please enter a name for the holiday.")
+            return
+        if not (add or remove):
+            return
+        try:
+            if add:
+                add_holiday(session, organization, holiday_date, holiday_name.strip())
+                changed_month = holiday_date
+            else:
+                delete_holiday(session, organization, remove_date)
+                changed_month = remove_date
+            # Workday counts of the month change, so its stored payslips must be recomputed
+            mark_organization_dirty(session, organization, changed_month.year, changed_month.month)
+            session.commit()
+            invalidate_holidays(organization)
+        except Exception as e:
+            session.rollback()
+            st.error(f"Failed to update holidays: {e}")
+            return
+        st.rerun()
 
 def attendance_page():
     if not st.session_state.get('is_logged_in', False):
@@ -69,106 +275,112 @@ def attendance_page():
         st.error("Organization info missing. Please login again.")
         return
 
-    session = get_session()
+    with session_scope(organization) as session:
+
+        st.title("Attendance Management")
+
+        employees = get_directory(session, organization)
+        if not employees:
+            st.info("No employees found for your organization. Please add employees first.")
+            return
+
+        mode = st.radio("Mark attendance for", ["One employee, whole month", "One day, whole department"],
+                        horizontal=True)
+        if mode == "One day, whole department":
+            department_day_section(session, organization, employees)
+            return
+
+        employee_names = [emp.name for emp in employees]
+        selected_employee = st.selectbox("Select Employee", employee_names)
+
+        today = datetime.today()
+        year = st.selectbox("Select Year", options=[today.year, today.year - 1, today.year - 2], index=0)
+        month = st.selectbox("Select Month", options=[
+            "January", "February", "March", "April", "May", "June",
+            "July", "August", "September", "October", "November", "December"
+        ], index=today.month - 1)
+
+        month_num = datetime.strptime(str(month), "%B").month
+
+        start_date = datetime(year, month_num, 1).date()
+        month_cal = month_calendar(session, organization, year, month_num)
+        end_date = date(year, month_num, month_cal.days_in_month)
+
+        employee = find_employee(employees, selected_employee)
+        attendance_map = month_attendance_map(session, employee.id, year, month_num)
+
+        st.write(f"Mark attendance for **{selected_employee}** in **{month} {year}**")
+
+        st.markdown("""
+            <style>
+            .attendance-scroll {
+                max-height: 280px;
+                overflow-y: auto;
+                border: 1px solid #ddd;
+                padding: 10px;
+                background-color: rgba(255,255,255,0.9);
+                border-radius: 6px;
+            }
+            .weekend-label {
+                color: #888888;
+                font-style: italic;
+            }
+            </style>
+        """, unsafe_allow_html=True)
+
+        with st.expander("Expand to mark monthly attendance", expanded=True):
+            st.markdown('<div class="attendance-scroll">', unsafe_allow_html=True)
+
+            month_days = [day for week in calendar_weeks(year, month_num) for day in week]  # Sunday start
+
+            day_names = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+            cols = st.columns(7)
+            for i, day_name in enumerate(day_names):
+                cols[i].markdown(f"**{day_name}**")
+
+            col_index = 0
+            for day in month_days:
+                col = cols[col_index % 7]
+                col_index += 1
+
+                if day.month == month_num:
+                    is_sunday = day.weekday() == 6  # Only Sunday
+                    key = f"att_{employee.id}_{day.isoformat()}"
+                    default_val = attendance_map.get(day, False)
+
+                    if is_sunday:
+                        col.markdown(f'<span class="weekend-label">{day.day}</span>', unsafe_allow_html=True)
+                        col.checkbox("Present", value=False, key=key, disabled=True)
+                    elif is_holiday(month_cal, day):
+                        col.markdown(f'<span class="weekend-label">{day.day} (holiday)</span>', unsafe_allow_html=True)
+                        col.checkbox("Present", value=False, key=key, disabled=True)
+                    else:
+                        col.checkbox(f"{day.day}", value=default_val, key=key)
 
-    st.title("Attendance Management")
 
-    employees = session.query(Employee).filter_by(organization=organization).all()
-    if not employees:
-        st.info("No employees found for your organization. Please add employees first.")
-        return
-
-    employee_names = [emp.name for emp in employees]
-    selected_employee = st.selectbox("Select Employee", employee_names)
-
-    today = datetime.today()
-    year = st.selectbox("Select Year", options=[today.year, today.year - 1, today.year - 2], index=0)
-    month = st.selectbox("Select Month", options=[
-        "January", "February", "March", "April", "May", "June",
-        "July", "August", "September", "October", "November", "December"
-    ], index=today.month - 1)
-
-    month_num = datetime.strptime(str(month), "%B").month
-
-    start_date = datetime(year, month_num, 1).date()
-    end_date = (pd.Period(f'{year}-{month_num}').asfreq('M').end_time).date()
-
-    employee = session.query(Employee).filter_by(name=selected_employee, organization=organization).first()
-    existing_attendance = session.query(Attendance).filter(
-        Attendance.employee_id == employee.id,
-        Attendance.date >= start_date,
-        Attendance.date <= end_date
-    ).all()
-    attendance_map = {att.date: att.is_present for att in existing_attendance}
-
-    st.write(f"Mark attendance for **{selected_employee}** in **{month} {year}**")
-
-    st.markdown("""
-        <style>
-        .attendance-scroll {
-            max-height: 280px;
-            overflow-y: auto;
-            border: 1px solid #ddd;
-            padding: 10px;
-            background-color: rgba(255,255,255,0.9);
-            border-radius: 6px;
-        }
-        .weekend-label {
-            color: #888888;
-            font-style: italic;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-
-    with st.expander("Expand to mark monthly attendance", expanded=True):
-        st.markdown('<div class="attendance-scroll">', unsafe_allow_html=True)
-
-        cal = calendar.Calendar(firstweekday=6)  # Sunday start
-        month_days = list(cal.itermonthdates(year, month_num))
-
-        day_names = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
-        cols = st.columns(7)
-        for i, day_name in enumerate(day_names):
-            cols[i].markdown(f"**{day_name}**")
-
-        col_index = 0
-        for day in month_days:
-            col = cols[col_index % 7]
-            col_index += 1
-
-            if day.month == month_num:
-                is_sunday = day.weekday() == 6  # Only Sunday
-                key = f"att_{employee.id}_{day.isoformat()}"
-                default_val = attendance_map.get(day, False)
-
-                if is_sunday:
-                    col.markdown(f'<span class="weekend-label">{day.day}</span>', unsafe_allow_html=True)
-                    col.checkbox("Present", value=False, key=key, disabled=True)
                 else:
-                    col.checkbox(f"{day.day}", value=default_val, key=key)
+                    col.markdown(" ")
 
-                
-            else:
-                col.markdown(" ")
+            st.markdown('</div>', unsafe_allow_html=True)
 
-        st.markdown('</div>', unsafe_allow_html=True)
+        if st.button("Save Attendance"):
+            # Only workdays are editable; presence stored on Sundays or holidays is left as it is
+            day_values = {
+                day: st.session_state.get(f"att_{employee.id}_{day.isoformat()}", False)
+                for day in month_days
+                if day.month == month_num and is_workday(month_cal, day)
+            }
+            changed = save_attendance_bulk(session, selected_employee, organization, day_values, attendance_map)
+            if changed is not None:
+                st.success(f"Attendance saved for {len(day_values)} days for {selected_employee} ({changed} changed).")
 
-    if st.button("Save Attendance"):
-        count = 0
-        for day in month_days:
-            if day.month != month_num:
-                continue
-            key = f"att_{employee.id}_{day.isoformat()}"
-            is_present = st.session_state.get(key, False)
-            mark_attendance(session, selected_employee, day, is_present, organization)
-            count += 1
-        st.success(f"Attendance saved for {count} days for {selected_employee}.")
+        holiday_section(session, organization, year, month_num, month_cal)
 
-    st.subheader("Delete Employee")
-    delete_employee_name = st.selectbox("Select Employee to Delete", employee_names, key="delete_emp")
+        st.subheader("Delete Employee")
+        delete_employee_name = st.selectbox("Select Employee to Delete", employee_names, key="delete_emp")
 
-    if st.button("Delete Selected Employee"):
-        delete_employee(session, delete_employee_name, organization)
+        if st.button("Delete Selected Employee"):
+            delete_employee(session, delete_employee_name, organization)
 
-    st.subheader(f"Attendance on Selected Month: {month} {year}")
-    refresh_treeview(session, start_date, organization)
+        st.subheader(f"Attendance on Selected Month: {month} {year}")
+        refresh_treeview(session, start_date, organization, end_date)
@@ -0,0 +1,154 @@
+"""Load test for the read-only HTTP API, using only the standard library.
+
+    python -m benchmarks.api_load --db /tmp/bench.db --clients 32 --seconds 10
+
+Starts api_server.py in a subprocess against a benchmark database and drives it
+with keep-alive clients on asyncio streams. Each client walks every page of
+the employees, attendance and payslips endpoints for one month, then repeats.
+The first walk renders every page from the database; after that, phase one
+sends plain requests (served from the response cache) and phase two replays with If-None-Match, the way a
+poller that remembers ETags would. Reports requests per second, latency
+percentiles and status counts for both.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date
+from urllib.parse import quote
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+async def fetch(reader, writer, path, headers):
+    request = f"GET {path} HTTP/1.1\r\nHost: bench\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+    writer.write(request.encode("latin-1"))
+    await writer.drain()
+    status_line = await reader.readline()
+    response_headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(response_headers.get("content-length", 0)))
+    return int(status_line.split()[1]), response_headers, body
+
+async def client(host, port, paths, deadline, conditional, etags, latencies, statuses, token):
+    reader, writer = await asyncio.open_connection(host, port)
+    base_headers = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        while time.perf_counter() < deadline:
+            for path in paths:
+                headers = dict(base_headers)
+                if conditional and path in etags:
+                    headers["If-None-Match"] = etags[path]
+                start = time.perf_counter()
+                status, response_headers, _ = await fetch(reader, writer, path, headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] += 1
+                if "etag" in response_headers:
+                    etags[path] = response_headers["etag"]
+                if time.perf_counter() >= deadline:
+                    break
+    finally:
+        writer.close()
+
+async def run_phase(host, port, paths, clients, seconds, conditional, etags, token):
+    latencies, statuses = [], Counter()
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        client(host, port, paths, deadline, conditional, etags, latencies, statuses, token) for _ in range(clients)
+    ])
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "statuses": dict(statuses),
+    }
+
+async def page_paths(host, port, org, period, page_size, token):
+    """Every page of the three list endpoints, discovered by following next_after."""
+    reader, writer = await asyncio.open_connection(host, port)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    paths = []
+    try:
+        for resource, query in (("employees", ""), ("attendance", f"month={period}&"), ("payslips", f"month={period}&")):
+            after = 0
+            while after is not None:
+                path = f"/orgs/{quote(org)}/{resource}?{query}after={after}&limit={page_size}"
+                status, _, body = await fetch(reader, writer, path, headers)
+                if status != 200:
+                    raise SystemExit(f"{path} returned {status}: {body[:200]!r}")
+                paths.append(path)
+                after = json.loads(body)["next_after"]
+    finally:
+        writer.close()
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the payroll API.")
+    parser.add_argument("--db", help="existing benchmark database (generated if missing)")
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--page-size", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="payroll_bench_"), "api.db")
+    os.environ["PAYROLL_DB"] = db_path
+    from benchmarks.datagen import generate, org_name
+    if not os.path.exists(db_path):
+        info = generate(db_path, 1, args.employees, 1)
+        print(f"Generated {info['attendance_rows']} attendance rows in {info['seconds']}s")
+
+    token = "load-test"
+    env = dict(os.environ, PAYROLL_API_TOKEN=token)
+    server = subprocess.Popen(
+        [sys.executable, "api_server.py", "--port", "0", "--db", db_path, "--pool-size", str(args.pool_size)],
+        cwd=APP_DIR, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        match = re.search(r"http://([\d.]+):(\d+)", server.stdout.readline())
+        if not match:
+            raise SystemExit("API server did not start")
+        host, port = match.group(1), int(match.group(2))
+
+        last_month = date.today().replace(day=1)
+        year, month = (last_month.year - 1, 12) if last_month.month == 1 else (last_month.year, last_month.month - 1)
+        period = f"{year}-{month:02d}"
+        started = time.perf_counter()
+        paths = asyncio.run(page_paths(host, port, org_name(0), period, args.page_size, token))
+        print(f"{len(paths)} distinct pages for {org_name(0)} {period}; first (uncached) pass "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        print(f"{args.clients} clients, {args.seconds:.0f}s per phase\n")
+
+        etags = {}
+        for label, conditional in (("plain GET", False), ("If-None-Match", True)):
+            result = asyncio.run(run_phase(host, port, paths, args.clients, args.seconds, conditional, etags, token))
+            print(f"{label:<14} {result['requests']:>7} requests  {result['rps']:>8.0f} req/s  "
+                  f"p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  p99 {result['p99_ms']:>7.2f} ms  "
+                  f"statuses {result['statuses']}")
+    finally:
+        server.terminate()
+        server.wait()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
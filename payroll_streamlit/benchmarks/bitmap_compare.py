@@ -0,0 +1,143 @@
+"""Compare daily attendance rows with the monthly bitmaps on a multi-year dataset.
+
+    python -m benchmarks.bitmap_compare --employees 1000 --years 3
+
+Reports storage (rows and bytes), Python memory needed to load a year of one
+organization's attendance, and query time for the lookups the pages make.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+def timed(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def traced_peak(fn):
+    tracemalloc.start()
+    try:
+        result = fn()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def table_bytes(conn, table):
+    try:
+        return conn.exec_driver_sql("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (table,)).scalar()
+    except Exception:
+        return None  # SQLite built without the dbstat virtual table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Daily rows vs monthly bitmaps.")
+    parser.add_argument("--db", help="existing benchmark database (generated if missing)")
+    parser.add_argument("--orgs", type=int, default=1)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="payroll_bench_"), "bitmap.db")
+    os.environ["PAYROLL_DB"] = db_path
+    from sqlalchemy import func
+    from connection import engine, session_scope
+    from db_setup import Attendance, AttendanceMonth, Employee
+    from attendance_bitmap import load_month_masks, month_attendance_map, popcount
+    from payroll_engine import month_bounds
+    from workday_calendar import build_month
+    from benchmarks.datagen import generate, org_name
+
+    if not os.path.exists(db_path):
+        info = generate(db_path, args.orgs, args.employees, args.years)
+        print(f"Generated {info['attendance_rows']} attendance rows ({info['start']} to {info['end']})")
+
+    org = org_name(0)
+    with session_scope() as session:
+        employee_id = session.query(Employee.id).filter(Employee.organization == org).order_by(Employee.id).limit(1).scalar()
+        last = session.query(func.max(AttendanceMonth.year * 100 + AttendanceMonth.month)).scalar()
+    year, month = divmod(last, 100)
+    start_date, end_date = month_bounds(year, month)
+
+    with engine.connect() as conn:
+        print("\nStorage")
+        for table in ("attendances", "attendance_months"):
+            rows = conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar()
+            size = table_bytes(conn, table)
+            print(f"  {table:<20} {rows:>10} rows" + (f"  {size / 1e6:>8.1f} MB" if size else ""))
+
+    # --- memory to load one organization's last 12 months
+    def load_daily_year():
+        with session_scope() as session:
+            return session.query(Attendance).join(Employee).filter(
+                Employee.organization == org,
+                Attendance.date > end_date.replace(year=end_date.year - 1),
+                Attendance.date <= end_date,
+            ).all()
+
+    def load_bitmap_year():
+        with session_scope() as session:
+            return session.query(AttendanceMonth.employee_id, AttendanceMonth.year, AttendanceMonth.month,
+                                 AttendanceMonth.present_mask).join(Employee).filter(
+                Employee.organization == org,
+                AttendanceMonth.year * 100 + AttendanceMonth.month > (year - 1) * 100 + month,
+            ).all()
+
+    daily, daily_peak = traced_peak(load_daily_year)
+    bitmaps, bitmap_peak = traced_peak(load_bitmap_year)
+    print("\nMemory to load 12 months for one organization")
+    print(f"  daily ORM rows   {len(daily):>10} objects  {daily_peak / 1e6:>8.1f} MB")
+    print(f"  monthly bitmaps  {len(bitmaps):>10} tuples   {bitmap_peak / 1e6:>8.1f} MB")
+    del daily, bitmaps
+
+    # --- query time for the page lookups
+    def daily_attendance_map():
+        with session_scope() as session:
+            records = session.query(Attendance).filter(
+                Attendance.employee_id == employee_id,
+                Attendance.date >= start_date,
+                Attendance.date <= end_date,
+            ).all()
+            return {a.date: a.is_present for a in records}
+
+    def bitmap_attendance_map():
+        with session_scope() as session:
+            return month_attendance_map(session, employee_id, year, month)
+
+    def daily_days_present():
+        with session_scope() as session:
+            return dict(session.query(Attendance.employee_id, func.count(Attendance.id)).join(Employee).filter(
+                Employee.organization == org,
+                Attendance.date >= start_date,
+                Attendance.date <= end_date,
+                Attendance.is_present.is_(True),
+                func.strftime('%w', Attendance.date) != '0',
+            ).group_by(Attendance.employee_id).all())
+
+    def bitmap_days_present():
+        with session_scope() as session:
+            masks = load_month_masks(session, org, year, month)
+            return dict(zip(masks.index, popcount(masks.to_numpy() & build_month(year, month).workday_mask)))
+
+    assert {d for d, p in daily_attendance_map().items() if p} == set(bitmap_attendance_map())
+    assert {k: v for k, v in daily_days_present().items() if v} == {k: v for k, v in bitmap_days_present().items() if v}
+
+    print(f"\nQuery time (median of {args.repeat}) for {year}-{month:02d}")
+    for label, daily_fn, bitmap_fn in [
+        ("one employee's month (attendance page)", daily_attendance_map, bitmap_attendance_map),
+        ("present workdays, whole org (pay run)", daily_days_present, bitmap_days_present),
+    ]:
+        daily_ms = timed(daily_fn, args.repeat)
+        bitmap_ms = timed(bitmap_fn, args.repeat)
+        print(f"  {label:<42} daily {daily_ms:>9.3f} ms   bitmap {bitmap_ms:>9.3f} ms   ({daily_ms / bitmap_ms:.1f}x)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
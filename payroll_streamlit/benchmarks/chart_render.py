@@ -0,0 +1,47 @@
+"""Cost of the payslip charts per render.
+
+    python -m benchmarks.chart_render
+
+For each chart mode, times building the bar and pie figures from scratch and
+from the cache, serializing them the way st.plotly_chart does, and reports the
+size of the JSON sent to the browser.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import plotly.io
+
+from payslip_charts import salary_charts
+
+SAMPLE_AMOUNTS = (18250.0, 3650.0, 1825.0, 2500.0, 0.0, 1311.25)
+
+def timed(fn, repeat):
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time payslip chart generation.")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    salary_charts(SAMPLE_AMOUNTS, "express")  # first-use imports (pandas, plotly.express)
+    print(f"{'mode':<8} {'build':>10} {'cached':>10} {'to_json':>10} {'payload':>10}")
+    for mode in ("express", "light"):
+        # Distinct amounts on every call so nothing is served from the cache
+        build_ms = timed(lambda i: salary_charts.__wrapped__(tuple(a + i for a in SAMPLE_AMOUNTS), mode), args.repeat)
+        salary_charts(SAMPLE_AMOUNTS, mode)
+        cached_ms = timed(lambda i: salary_charts(SAMPLE_AMOUNTS, mode), args.repeat)
+        figures = salary_charts(SAMPLE_AMOUNTS, mode)
+        json_ms = timed(lambda i: [plotly.io.to_json(f, validate=False) for f in figures], args.repeat)
+        payload = sum(len(plotly.io.to_json(f, validate=False)) for f in figures)
+        print(f"{mode:<8} {build_ms:>8.2f}ms {cached_ms:>8.4f}ms {json_ms:>8.2f}ms {payload / 1024:>8.1f}KB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
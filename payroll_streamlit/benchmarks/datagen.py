@@ -0,0 +1,117 @@
+"""Seeded synthetic data for benchmarking.
+
+    python -m benchmarks.datagen --db /tmp/bench.db --orgs 3 --employees 500 --years 2
+
+Creates (or replaces) a scratch SQLite database with the app's schema and fills
+it with organizations x employees x years of daily attendance. The same seed
+always produces the same data.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from connection import make_engine
+from db_setup import Employee, Attendance, User
+from attendance_bitmap import rebuild_bitmaps
+from setup import setup_database
+
+DEPARTMENTS = ["Accounts", "Administration", "Teaching", "Transport", "Maintenance", "Library", "IT", "Sports"]
+FIRST_NAMES = ["Aarav", "Diya", "Ishaan", "Kavya", "Rohan", "Saanvi", "Vivaan", "Ananya", "Arjun", "Meera"]
+LAST_NAMES = ["Sharma", "Verma", "Gupta", "Singh", "Kumar", "Patel", "Reddy", "Iyer", "Das", "Joshi"]
+
+BATCH_SIZE = 20000
+
+def org_name(index):
+    return f"Benchmark Org {index + 1}"
+
+def user_name(index):
+    return f"admin{index + 1}"
+
+USER_PASSWORD = "benchmark"
+
+def generate(path, orgs=2, employees=200, years=1, end=None, seed=42):
+    """Fill a fresh database at `path`. Returns a dict describing the dataset."""
+    if os.path.exists(path):
+        os.remove(path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    engine = make_engine(path)
+    setup_database(engine)
+
+    end = end or date.today().replace(day=1) - timedelta(days=1)
+    # `years` whole months ending with the month of `end`
+    if end.month == 12:
+        start = date(end.year - years + 1, 1, 1)
+    else:
+        start = date(end.year - years, end.month + 1, 1)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    started = time.perf_counter()
+    attendance_rows = 0
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"username": user_name(o), "password": USER_PASSWORD, "organization": org_name(o)}
+            for o in range(orgs)
+        ])
+        for o in range(orgs):
+            conn.execute(insert(Employee), [
+                {
+                    "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {o + 1}-{e + 1}",
+                    "department": rng.choice(DEPARTMENTS),
+                    "basic_salary": float(rng.randrange(8000, 120000, 500)),
+                    "organization": org_name(o),
+                }
+                for e in range(employees)
+            ])
+
+        employee_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM employees ORDER BY id")]
+        batch = []
+        for employee_id in employee_ids:
+            # Each employee has their own attendance habit, from patchy to perfect
+            presence = rng.uniform(0.6, 1.0)
+            for day in days:
+                if day.weekday() == 6:
+                    continue
+                batch.append({"employee_id": employee_id, "date": day, "is_present": rng.random() < presence})
+                if len(batch) >= BATCH_SIZE:
+                    conn.execute(insert(Attendance), batch)
+                    attendance_rows += len(batch)
+                    batch = []
+        if batch:
+            conn.execute(insert(Attendance), batch)
+            attendance_rows += len(batch)
+        rebuild_bitmaps(conn)
+    engine.dispose()
+
+    return {
+        "orgs": orgs,
+        "employees_per_org": employees,
+        "years": years,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "attendance_rows": attendance_rows,
+        "seed": seed,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic payroll database.")
+    parser.add_argument("--db", required=True, help="path of the scratch database to create")
+    parser.add_argument("--orgs", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=200, help="employees per organization")
+    parser.add_argument("--years", type=int, default=1, help="years of daily attendance")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    info = generate(args.db, args.orgs, args.employees, args.years, seed=args.seed)
+    print(f"Generated {info['attendance_rows']} attendance rows for {args.orgs} x {args.employees} employees "
+          f"({info['start']} to {info['end']}) in {info['seconds']}s")
+
+if __name__ == "__main__":
+    main()
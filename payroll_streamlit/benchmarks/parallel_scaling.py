@@ -0,0 +1,73 @@
+"""How the parallel pay run scales with worker processes.
+
+    python -m benchmarks.parallel_scaling --employees 20000 --years 3 --workers 1 2 4 8
+
+Recalculates every month of the dataset for one organization with each worker
+count, checks the result equals the serial run_payroll output month by month,
+and prints wall time and speedup over the smallest worker count.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling of the parallel pay run.")
+    parser.add_argument("--db", help="existing benchmark database (generated if missing)")
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="payroll_bench_"), "parallel.db")
+    os.environ["PAYROLL_DB"] = db_path
+    import pandas as pd
+    from sqlalchemy import func
+    from connection import session_scope
+    from db_setup import AttendanceMonth
+    from payroll_engine import run_payroll
+    from parallel_payroll import month_range, run_payroll_parallel
+    from benchmarks.datagen import generate, org_name
+
+    if not os.path.exists(db_path):
+        info = generate(db_path, 1, args.employees, args.years)
+        print(f"Generated {info['attendance_rows']} attendance rows in {info['seconds']}s")
+
+    with session_scope() as session:
+        first, last = session.query(
+            func.min(AttendanceMonth.year * 100 + AttendanceMonth.month),
+            func.max(AttendanceMonth.year * 100 + AttendanceMonth.month),
+        ).one()
+    months = month_range(divmod(first, 100), divmod(last, 100))
+    org = org_name(0)
+    today = date.today()
+
+    started = time.perf_counter()
+    with session_scope() as session:
+        serial = pd.concat([
+            run_payroll(session, org, y, m, today=today).assign(year=y, month=m) for y, m in months
+        ], ignore_index=True)
+    serial_seconds = time.perf_counter() - started
+    print(f"{org}: {len(months)} months, {len(serial)} payslips; month-by-month run_payroll {serial_seconds:.2f}s\n")
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        samples = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = run_payroll_parallel(org, months, workers=workers, db_path=db_path, today=today)
+            samples.append(time.perf_counter() - started)
+        expected = serial.reindex(columns=result.columns)
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected, check_dtype=False)
+        seconds = statistics.median(samples)
+        baseline = baseline or seconds
+        print(f"  {workers:>3} worker(s)  {seconds:>8.2f}s  speedup {baseline / seconds:>5.2f}x  "
+              f"net total {result['net_salary'].sum():,.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
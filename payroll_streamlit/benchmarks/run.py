@@ -0,0 +1,237 @@
+"""Timed benchmarks for the payroll hot paths.
+
+    python -m benchmarks.run --employees 500 --years 2 --output results.json
+    python -m benchmarks.run --db /tmp/bench.db --compare results.json
+
+Each benchmark calls the same function the page uses, once to warm up and then
+`--repeat` times, and reports median/p95 latency and SQL statements per call.
+Results are written as JSON so runs from different versions can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+class QueryCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+def measure(name, fn, counter, repeat):
+    fn()  # warm up caches and the connection pool
+    timings, queries = [], []
+    for i in range(repeat):
+        before = counter.count
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count - before)
+    return {
+        "name": name,
+        "repeat": repeat,
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "min_ms": round(min(timings), 3),
+        "queries_per_call": round(statistics.mean(queries), 2),
+    }
+
+def build_benchmarks(org, year, month):
+    """Return (name, callable) pairs; imports happen here so PAYROLL_DB is already set."""
+    from connection import session_scope
+    from db_setup import Employee, Payslip
+    from attendance_module import (mark_attendance, save_attendance_bulk, monthly_attendance_matrix,
+                                   department_day_attendance, save_department_day)
+    from analytics_module import department_trends
+    from auth_module import authenticate
+    from employee_module import search_employees
+    from payroll_engine import month_bounds, run_payroll
+    from payslip_ledger import get_payslips
+    from benchmarks.datagen import user_name, USER_PASSWORD
+
+    start_date, end_date = month_bounds(year, month)
+    with session_scope() as session:
+        employee_id, employee_name, department = session.query(Employee.id, Employee.name, Employee.department).filter(
+            Employee.organization == org
+        ).order_by(Employee.id).first()
+        department_names = [name for (name,) in session.query(Employee.name).filter(
+            Employee.organization == org, Employee.department == department)]
+    month_days = [date(year, month, d) for d in range(1, end_date.day + 1)]
+    grid_day = next(d for d in month_days if d.weekday() != 6)
+    toggle = {"value": False}
+
+    def payslip_compute():
+        with session_scope() as session:
+            run_payroll(session, org, year, month, employee_ids=[employee_id])
+
+    def payslip_ledger_read():
+        with session_scope() as session:
+            get_payslips(session, org, year, month, employee_ids=[employee_id])
+
+    def payroll_run_org():
+        with session_scope() as session:
+            run_payroll(session, org, year, month)
+
+    def payroll_ledger_org_recompute():
+        with session_scope() as session:
+            session.query(Payslip).update({Payslip.is_dirty: True})
+            session.commit()
+            get_payslips(session, org, year, month)
+
+    def attendance_save_month():
+        # Flip every workday so each call writes a full month
+        toggle["value"] = not toggle["value"]
+        with session_scope() as session:
+            values = {d: toggle["value"] and d.weekday() != 6 for d in month_days}
+            save_attendance_bulk(session, employee_name, org, values, {d: not v for d, v in values.items()})
+
+    def attendance_save_month_per_day():
+        # The old Save Attendance loop: one lookup, select and commit per day
+        toggle["value"] = not toggle["value"]
+        with session_scope() as session:
+            for d in month_days:
+                mark_attendance(session, employee_name, d, toggle["value"] and d.weekday() != 6, org)
+
+    def attendance_save_department_day():
+        # The day grid: one query to load, every row flipped, one transaction to save
+        with session_scope() as session:
+            loaded = department_day_attendance(session, org, department, grid_day)
+            save_department_day(session, org, grid_day, loaded, loaded.assign(Present=~loaded["Present"]))
+
+    def attendance_save_department_day_per_employee():
+        # The same day marked employee by employee, one commit each
+        toggle["value"] = not toggle["value"]
+        with session_scope() as session:
+            for name in department_names:
+                mark_attendance(session, name, grid_day, toggle["value"], org)
+
+    def attendance_month_matrix():
+        with session_scope() as session:
+            monthly_attendance_matrix(session, org, start_date, end_date)
+
+    def analytics_trends_12_months():
+        # Uncached: what the Analytics page costs after every write
+        with session_scope() as session:
+            department_trends(session, org, year, month, 12)
+
+    def employee_list_page():
+        with session_scope() as session:
+            search_employees(session, org, "", page=0)
+
+    def employee_search():
+        with session_scope() as session:
+            search_employees(session, org, "sharma", page=0)
+
+    def login_lookup():
+        with session_scope() as session:
+            authenticate(session, user_name(0), USER_PASSWORD, org)
+
+    return [
+        ("payslip_compute", payslip_compute),
+        ("payslip_ledger_read", payslip_ledger_read),
+        ("payroll_run_org", payroll_run_org),
+        ("payroll_ledger_org_recompute", payroll_ledger_org_recompute),
+        ("attendance_save_month", attendance_save_month),
+        ("attendance_save_month_per_day", attendance_save_month_per_day),
+        ("attendance_save_department_day", attendance_save_department_day),
+        ("attendance_save_department_day_per_employee", attendance_save_department_day_per_employee),
+        ("attendance_month_matrix", attendance_month_matrix),
+        ("analytics_trends_12_months", analytics_trends_12_months),
+        ("employee_list_page", employee_list_page),
+        ("employee_search", employee_search),
+        ("login_lookup", login_lookup),
+    ]
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get(result["name"])
+        if not old:
+            continue
+        change = (result["median_ms"] - old["median_ms"]) / old["median_ms"] * 100 if old["median_ms"] else 0.0
+        print(f"  {result['name']:<30} {old['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms "
+              f"({change:+.1f}%), queries {old['queries_per_call']} -> {result['queries_per_call']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the payroll hot paths.")
+    parser.add_argument("--db", help="existing benchmark database (generated with --orgs/--employees/--years if missing)")
+    parser.add_argument("--orgs", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=500)
+    parser.add_argument("--years", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--only", action="append", help="run only the named benchmark (repeatable)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="payroll_bench_"), "bench.db")
+    # Must be set before anything imports connection
+    os.environ["PAYROLL_DB"] = db_path
+    from connection import engine
+    from benchmarks.datagen import generate, org_name
+
+    dataset = None
+    if not os.path.exists(db_path):
+        dataset = generate(db_path, args.orgs, args.employees, args.years, seed=args.seed)
+        print(f"Generated {dataset['attendance_rows']} attendance rows in {dataset['seconds']}s")
+
+    last_month = date.today().replace(day=1)
+    year, month = (last_month.year - 1, 12) if last_month.month == 1 else (last_month.year, last_month.month - 1)
+    counter = QueryCounter(engine)
+
+    results = []
+    for name, fn in build_benchmarks(org_name(0), year, month):
+        if args.only and name not in args.only:
+            continue
+        result = measure(name, fn, counter, args.repeat)
+        results.append(result)
+        print(f"{name:<30} median {result['median_ms']:>10.3f} ms   p95 {result['p95_ms']:>10.3f} ms   "
+              f"queries {result['queries_per_call']}")
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "database": db_path,
+        "dataset": dataset,
+        "period": f"{year}-{month:02d}",
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Write throughput of one shared database vs one database per organization.
+
+    python -m benchmarks.shard_writes --tenants 1 2 4 8 --employees 200 --seconds 5
+
+Generates a shared benchmark database with as many organizations as the largest
+tenant count and splits it with shard_tool. For each tenant count, one thread
+per organization keeps saving a whole day of attendance for all its employees
+(upsert_attendance and a commit, as at month end), first with every tenant in
+the shared database and then with each tenant in its own shard. Reports saves
+per second, attendance rows per second and commit latency for both.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+def tenant_writer(Session, organization, days, deadline, start, latencies, rows_written, errors, seed):
+    from db_setup import Employee
+    from attendance_module import upsert_attendance
+
+    rng = random.Random(seed)
+    session = Session()
+    try:
+        employee_ids = [row[0] for row in session.query(Employee.id).filter(Employee.organization == organization)]
+        session.rollback()
+        start.wait()
+        i = 0
+        while time.perf_counter() < deadline:
+            day = days[i % len(days)]
+            i += 1
+            rows = [{'employee_id': e, 'date': day, 'is_present': rng.random() < 0.9} for e in employee_ids]
+            began = time.perf_counter()
+            try:
+                upsert_attendance(session, rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                errors.append(e)
+                continue
+            latencies.append((time.perf_counter() - began) * 1000)
+            rows_written.append(len(rows))
+    finally:
+        session.close()
+
+def run_round(sessions_by_org, organizations, seconds):
+    """One writer thread per organization for `seconds`; returns the measurements."""
+    # Future workdays, so every save writes the same kind of rows in both modes
+    first = date.today().replace(year=date.today().year + 1, month=1, day=1)
+    days = [first + timedelta(days=i) for i in range(365) if (first + timedelta(days=i)).weekday() < 6]
+    latencies, rows_written, errors = [], [], []
+    start = threading.Event()
+    deadline = time.perf_counter() + seconds + 1  # the extra second covers thread start-up
+    threads = [
+        threading.Thread(target=tenant_writer, args=(
+            sessions_by_org[organization], organization, days, deadline, start, latencies, rows_written, errors, i))
+        for i, organization in enumerate(organizations)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(1)
+    began = time.perf_counter()
+    start.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    return {
+        "saves_per_second": len(latencies) / elapsed,
+        "rows_per_second": sum(rows_written) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95_ms": percentile(latencies, 0.95) if latencies else float("nan"),
+        "errors": len(errors),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare write throughput of shared and per-tenant databases.")
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 2, 4, 8], help="concurrent tenant counts")
+    parser.add_argument("--employees", type=int, default=200, help="employees per organization")
+    parser.add_argument("--seconds", type=float, default=5, help="duration of each round")
+    parser.add_argument("--dir", help="scratch directory (default: a new temporary one)")
+    args = parser.parse_args(argv)
+
+    work_dir = args.dir or tempfile.mkdtemp(prefix="payroll_shards_")
+    shared_path = os.path.join(work_dir, "shared.db")
+    shard_dir = os.path.join(work_dir, "shards")
+    os.environ["PAYROLL_DB"] = shared_path
+    from sqlalchemy.orm import sessionmaker
+    from connection import make_engine, shard_file_name
+    from benchmarks.datagen import generate, org_name
+    from shard_tool import split_database
+
+    most = max(args.tenants)
+    info = generate(shared_path, most, args.employees, 1)
+    print(f"Generated {most} organizations x {args.employees} employees "
+          f"({info['attendance_rows']} attendance rows) in {info['seconds']}s")
+    split_database(shared_path, shard_dir)
+    organizations = [org_name(i) for i in range(most)]
+
+    pool = dict(pool_size=most, max_overflow=0)
+    shared_engine = make_engine(shared_path, **pool)
+    shared = sessionmaker(bind=shared_engine)
+    shard_engines = {o: make_engine(os.path.join(shard_dir, shard_file_name(o)), **pool) for o in organizations}
+    sharded = {o: sessionmaker(bind=engine) for o, engine in shard_engines.items()}
+
+    print(f"{os.cpu_count()} CPU(s), {args.seconds:.0f}s per round, one save = one day for {args.employees} employees\n")
+    print(f"{'tenants':>7}  {'layout':<8} {'saves/s':>8} {'rows/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+    try:
+        for count in sorted(args.tenants):
+            tenants = organizations[:count]
+            for label, sessions in (("shared", {o: shared for o in tenants}), ("sharded", sharded)):
+                result = run_round(sessions, tenants, args.seconds)
+                print(f"{count:>7}  {label:<8} {result['saves_per_second']:>8.1f} {result['rows_per_second']:>9.0f} "
+                      f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['errors']:>6}")
+    finally:
+        shared_engine.dispose()
+        for engine in shard_engines.values():
+            engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
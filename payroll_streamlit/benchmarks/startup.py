@@ -0,0 +1,119 @@
+"""Cold-start cost of the Streamlit entry point.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --section Payslip --top 15
+
+Runs main.py in a fresh interpreter (under `python -X importtime`) with
+Streamlit's AppTest harness against a scratch database, and reports:
+
+- time to first render of the login page,
+- the modules main.py imported to get there, heaviest first,
+- whether pandas, numpy and plotly were loaded before anyone logged in,
+- with --section, the extra time and imports of first opening that section.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "pyarrow", "openpyxl"]
+MARKER = "--- startup benchmark: app starts here ---"
+
+# Runs in the child process; everything it imports before MARKER is the harness's own cost
+_CHILD = r"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+print(MARKER, file=sys.stderr, flush=True)
+at = AppTest.from_file("main.py", default_timeout=120)
+start = time.perf_counter()
+at.run()
+login_ms = (time.perf_counter() - start) * 1000
+loaded = {name: name in sys.modules for name in HEAVY}
+result = {"login_ms": login_ms, "loaded_at_login": loaded, "errors": [str(e.value) for e in at.exception]}
+if SECTION:
+    print(MARKER + " section", file=sys.stderr, flush=True)
+    at.session_state["is_logged_in"] = True
+    at.session_state["username"] = "benchmark"
+    at.session_state["organization"] = "Benchmark Org"
+    at.run()
+    at.selectbox[0].set_value(SECTION)
+    start = time.perf_counter()
+    at.run()
+    result["section_ms"] = (time.perf_counter() - start) * 1000
+    result["loaded_after_section"] = {name: name in sys.modules for name in HEAVY}
+    result["errors"] += [str(e.value) for e in at.exception]
+print(json.dumps(result))
+"""
+
+def parse_importtime(lines):
+    """Top-level imports from `-X importtime` output as (cumulative_us, module) pairs."""
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        # Nested imports are indented under the module that triggered them
+        if name.startswith(" ") and not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return imports
+
+def run_child(section):
+    env = dict(os.environ)
+    env.setdefault("PAYROLL_DB", os.path.join(tempfile.mkdtemp(prefix="payroll_startup_"), "startup.db"))
+    code = f"MARKER = {MARKER!r}\nHEAVY = {HEAVY_MODULES!r}\nSECTION = {section!r}\n" + _CHILD
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=APP_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"startup run failed:\n{proc.stderr[-4000:]}")
+    stderr = proc.stderr.splitlines()
+    login_lines, section_lines, current = [], [], None
+    for line in stderr:
+        if line.startswith(MARKER + " section"):
+            current = section_lines
+        elif line.startswith(MARKER):
+            current = login_lines
+        elif current is not None:
+            current.append(line)
+    return json.loads(proc.stdout.strip().splitlines()[-1]), login_lines, section_lines
+
+def print_imports(title, lines, top):
+    imports = sorted(parse_importtime(lines), reverse=True)
+    total_ms = sum(us for us, _ in imports) / 1000
+    print(f"\n{title}: {len(imports)} top-level imports, {total_ms:.0f} ms")
+    for us, name in imports[:top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the app's cold start.")
+    parser.add_argument("--section", help="also time first opening this sidebar section, e.g. Payslip")
+    parser.add_argument("--top", type=int, default=10, help="imports to list")
+    parser.add_argument("--output", help="write the measurements as JSON to this path")
+    args = parser.parse_args(argv)
+
+    result, login_lines, section_lines = run_child(args.section)
+    if result["errors"]:
+        print("App raised:", *result["errors"], sep="\n  ")
+
+    print(f"Time to first render of the login page: {result['login_ms']:.0f} ms")
+    print("Loaded before login: " + ", ".join(
+        f"{name}={'yes' if loaded else 'no'}" for name, loaded in result["loaded_at_login"].items()))
+    print_imports("Imported for the login page", login_lines, args.top)
+    if args.section:
+        print(f"\nFirst open of {args.section}: {result['section_ms']:.0f} ms")
+        print_imports(f"Imported for {args.section}", section_lines, args.top)
+
+    if args.output:
+        result["login_imports"] = [{"module": n, "cumulative_us": us} for us, n in parse_importtime(login_lines)]
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if result["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""Per-organization version counters for in-process caches.
+
+Code that changes cached data bumps the counter after committing; caches store
+the version they were built at and rebuild when it no longer matches.
+"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_versions = defaultdict(int)
+
+def current_version(scope, organization):
+    return _versions[(scope, organization)]
+
+def bump_version(scope, organization):
+    with _lock:
+        _versions[(scope, organization)] += 1
@@ -1,20 +1,176 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import re
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker, scoped_session
 import logging
 
 logging.basicConfig(level=logging.WARNING)
 logging.getLogger('sqlalchemy.engine').setLevel(logging.ERROR)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_NAME = os.path.join(BASE_DIR, "plus2_payroll.db")
+DB_NAME = os.environ.get("PAYROLL_DB", os.path.join(BASE_DIR, "plus2_payroll.db"))
 
-# Added connect_args to allow multi-threading with Streamlit
-engine = create_engine(f"sqlite:///{DB_NAME}", connect_args={"check_same_thread": False})
+# Sharded mode: every organization gets its own SQLite file in this directory, so
+# one tenant's writes never wait for another's. DB_NAME is then only the catalog
+# of users, contact messages and tenant -> shard assignments.
+SHARD_DIR = os.environ.get("PAYROLL_SHARD_DIR")
+if SHARD_DIR:
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    DB_NAME = os.environ.get("PAYROLL_CATALOG_DB", os.path.join(SHARD_DIR, "catalog.db"))
 
-Session = sessionmaker(bind=engine)
+POOL_SIZE = int(os.environ.get("PAYROLL_DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.environ.get("PAYROLL_DB_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = 30
+BUSY_TIMEOUT_MS = 5000
+
+# Applied to every new connection. WAL lets readers run alongside the single writer,
+# and busy_timeout makes writers wait for the lock instead of failing immediately.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -20000,  # ~20 MB page cache
+    "mmap_size": 268435456,  # 256 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": BUSY_TIMEOUT_MS,
+}
+
+def _set_sqlite_pragmas(readonly):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            # The journal mode is a property of the file and can't be changed read-only
+            if readonly and name == "journal_mode":
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+def make_engine(path=DB_NAME, readonly=False, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW):
+    """Create a pooled SQLite engine with the app's PRAGMAs applied."""
+    if readonly:
+        url = f"sqlite:///file:{path}?mode=ro&uri=true"
+    else:
+        url = f"sqlite:///{path}"
+    new_engine = create_engine(
+        url,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=POOL_TIMEOUT,
+        # Added connect_args to allow multi-threading with Streamlit
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_MS / 1000},
+    )
+    event.listen(new_engine, "connect", _set_sqlite_pragmas(readonly))
+    return new_engine
+
+engine = make_engine()
+
+Session = scoped_session(sessionmaker(bind=engine))
+
+_scope = threading.local()
+
+_engine_hooks = []
+_shard_lock = threading.Lock()
+_shards = {}  # shard file name -> (engine, scoped Session)
+_tenant_shards = {}  # organization -> shard file name
 
 def get_session():
     return Session()
 
+def on_new_engine(hook):
+    """Call hook(engine) for the main engine and every shard engine, including
+    shards opened later. Registering the same hook again does nothing, so it is
+    safe to call on every Streamlit rerun."""
+    with _shard_lock:
+        if hook in _engine_hooks:
+            return
+        _engine_hooks.append(hook)
+        engines = [engine] + [shard_engine for shard_engine, _ in _shards.values()]
+    for each in engines:
+        hook(each)
+
+def shard_file_name(organization):
+    slug = re.sub(r"[^a-z0-9]+", "-", organization.lower()).strip("-")[:40] or "org"
+    return f"{slug}-{hashlib.sha1(organization.encode('utf-8')).hexdigest()[:8]}.db"
+
+def tenant_shard(organization, create=True):
+    """File name of an organization's shard, registered in the catalog the first
+    time it is needed. Returns None for an unknown organization if not `create`."""
+    shard = _tenant_shards.get(organization)
+    if shard is not None:
+        return shard
+    from db_setup import Tenant
+    # A session of its own, so registering never commits a caller's pending work
+    with Session.session_factory() as session:
+        tenant = session.get(Tenant, organization)
+        if tenant is None:
+            if not create:
+                return None
+            session.add(Tenant(organization=organization, shard=shard_file_name(organization),
+                               created_at=datetime.now()))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()  # registered concurrently
+            tenant = session.get(Tenant, organization)
+        shard = tenant.shard
+    _tenant_shards[organization] = shard
+    return shard
+
+def database_path(organization=None, create=True):
+    """The SQLite file holding an organization's payroll data (DB_NAME unless sharded)."""
+    if not SHARD_DIR or organization is None:
+        return DB_NAME
+    shard = tenant_shard(organization, create)
+    return os.path.join(SHARD_DIR, shard) if shard else None
+
+def tenant_sessions(organization=None):
+    """The scoped session factory for an organization's database; shard engines
+    are created, and their schema brought up to date, once per process."""
+    if not SHARD_DIR or organization is None:
+        return Session
+    shard = tenant_shard(organization)
+    with _shard_lock:
+        entry = _shards.get(shard)
+        if entry is None:
+            shard_engine = make_engine(os.path.join(SHARD_DIR, shard))
+            from setup import setup_database  # setup imports this module
+            setup_database(shard_engine)
+            for hook in _engine_hooks:
+                hook(shard_engine)
+            entry = _shards[shard] = (shard_engine, scoped_session(sessionmaker(bind=shard_engine)))
+    return entry[1]
+
+def register_tenant(organization):
+    """Give a new organization its own database when sharded (no-op otherwise)."""
+    tenant_sessions(organization)
+
+@contextmanager
+def session_scope(organization=None):
+    """Thread-scoped session for one unit of work.
 
+    With an organization the session is bound to that organization's shard when
+    the app runs sharded; without one (or unsharded) it uses the main database.
+    Rolls back on error and returns the connection to the pool when the outermost
+    scope exits, so nested scopes in the same thread share one session.
+    """
+    registry = tenant_sessions(organization)
+    session = registry()
+    depths = getattr(_scope, "depths", None)
+    if depths is None:
+        depths = _scope.depths = {}
+    depth = depths.get(registry, 0)
+    depths[registry] = depth + 1
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        depths[registry] = depth
+        if depth == 0:
+            registry.remove()
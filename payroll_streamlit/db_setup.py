@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Index, UniqueConstraint, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -15,6 +15,10 @@ class Employee(Base):
 
     attendances = relationship("Attendance", back_populates="employee")
 
+    __table_args__ = (
+        Index('ix_employees_organization_name', 'organization', 'name'),
+    )
+
     def __repr__(self):
         return f"<Employee(id={self.id}, name={self.name}, department={self.department}, basic_salary={self.basic_salary}, organization={self.organization})>"
 
@@ -26,6 +30,10 @@ class User(Base):
     password = Column(String, nullable=False)
     organization = Column(String, nullable=False)  # Added organization column
 
+    __table_args__ = (
+        Index('ix_users_username_organization', 'username', 'organization'),
+    )
+
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, organization={self.organization})>"
 
@@ -36,9 +44,19 @@ class ContactMessage(Base):
     name = Column(String, nullable=False)
     email = Column(String, nullable=False)
     message = Column(String, nullable=False)
+    # Outbox state for the notification email: pending -> sent, or failed after max attempts
+    status = Column(String, nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_contact_messages_status_next_attempt', 'status', 'next_attempt_at'),
+    )
 
     def __repr__(self):
-        return f"<ContactMessage(id={self.id}, name={self.name}, email={self.email})>"
+        return f"<ContactMessage(id={self.id}, name={self.name}, email={self.email}, status={self.status})>"
 
 class Attendance(Base):
     __tablename__ = 'attendances'
@@ -50,5 +68,110 @@ class Attendance(Base):
 
     employee = relationship("Employee", back_populates="attendances")
 
+    __table_args__ = (
+        UniqueConstraint('employee_id', 'date', name='uq_attendances_employee_date'),
+    )
+
+    def __repr__(self):
+        return f"<Attendance(id={self.id}, employee_id={self.employee_id}, date={self.date}, is_present={self.is_present})>"
+
+class AttendanceMonth(Base):
+    """One row per employee per month; bit (day - 1) of present_mask is set when
+    the employee was present that day.
+
+    Derived from the daily Attendance rows, which stay authoritative, and written
+    in the same transaction. Pay runs and the pages read only the bitmaps;
+    `python -m payroll_streamlit check-attendance --repair` finds and rebuilds
+    bitmaps that disagree with the daily rows."""
+    __tablename__ = 'attendance_months'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey('employees.id'), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    present_mask = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('employee_id', 'year', 'month', name='uq_attendance_months_employee_month'),
+    )
+
+    def __repr__(self):
+        return f"<AttendanceMonth(employee_id={self.employee_id}, year={self.year}, month={self.month}, present_mask={self.present_mask:#x})>"
+
+class Payslip(Base):
+    __tablename__ = 'payslips'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    employee_id = Column(Integer, ForeignKey('employees.id'), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    basic_salary = Column(Float, nullable=False)
+    days_present = Column(Integer, nullable=False)
+    total_workdays = Column(Integer, nullable=False)
+    attendance_percentage = Column(Float, nullable=False)
+    basic_pay = Column(Float, nullable=False)
+    hra = Column(Float, nullable=False)
+    da = Column(Float, nullable=False)
+    bonus = Column(Float, nullable=False)
+    gross_salary = Column(Float, nullable=False)
+    penalty_applied = Column(Boolean, nullable=False)
+    penalty_amount = Column(Float, nullable=False)
+    deductions = Column(Float, nullable=False)
+    tax = Column(Float, nullable=False)
+    net_salary = Column(Float, nullable=False)
+    is_past_month = Column(Boolean, nullable=False)  # penalty rules apply once the month is over
+    is_dirty = Column(Boolean, nullable=False, default=False)
+    # Bumped whenever the row is marked dirty; a recompute is only stored if it is unchanged
+    dirty_generation = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('employee_id', 'year', 'month', name='uq_payslips_employee_month'),
+    )
+
+    def __repr__(self):
+        return f"<Payslip(id={self.id}, employee_id={self.employee_id}, year={self.year}, month={self.month}, net_salary={self.net_salary}, is_dirty={self.is_dirty})>"
+
+class SalaryRuleSet(Base):
+    """An organization's salary rules as JSON (see salary_rules). `version` goes up
+    by one on every save; organizations without a row use the default rules."""
+    __tablename__ = 'salary_rule_sets'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    organization = Column(String, nullable=False, unique=True)
+    version = Column(Integer, nullable=False, default=1)
+    rules = Column(Text, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<SalaryRuleSet(organization={self.organization}, version={self.version})>"
+
+class Holiday(Base):
+    """A non-working day declared by an organization; it is excluded from the
+    month's payable workdays (see workday_calendar)."""
+    __tablename__ = 'holidays'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    organization = Column(String, nullable=False)
+    date = Column(Date, nullable=False)
+    name = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('organization', 'date', name='uq_holidays_organization_date'),
+    )
+
+    def __repr__(self):
+        return f"<Holiday(organization={self.organization}, date={self.date}, name={self.name})>"
+
+
+class Tenant(Base):
+    """Catalog entry mapping an organization to its own database file when the
+    app runs sharded (PAYROLL_SHARD_DIR); unused otherwise."""
+    __tablename__ = 'tenants'
+
+    organization = Column(String, primary_key=True)
+    shard = Column(String, nullable=False, unique=True)  # file name inside the shard directory
+    created_at = Column(DateTime, nullable=False)
+
     def __repr__(self):
-        return f"<Attendance(id={self.id}, employee_id={self.employee_id}, date={self.date}, is_present={self.is_present})>"
\ No newline at end of file
+        return f"<Tenant(organization={self.organization}, shard={self.shard})>"
@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from cache_versions import bump_version, current_version
+from db_setup import Employee
+
+DIRECTORY_SCOPE = "employees"
+MAX_CACHED_ORGANIZATIONS = 256
+
+EmployeeEntry = namedtuple("EmployeeEntry", ["id", "name", "department", "basic_salary"])
+
+_lock = threading.Lock()
+_directories = OrderedDict()  # organization -> (version, entries), least recently used first
+
+def get_directory(session, organization):
+    """An organization's employees as EmployeeEntry tuples in id order.
+
+    Served from memory until the directory version is bumped by a write; only the
+    MAX_CACHED_ORGANIZATIONS most recently used organizations are kept.
+    """
+    version = current_version(DIRECTORY_SCOPE, organization)
+    with _lock:
+        cached = _directories.get(organization)
+        if cached is not None and cached[0] == version:
+            _directories.move_to_end(organization)
+            return cached[1]
+
+    # The version is read before querying, so a write committed meanwhile leaves
+    # this entry already stale and the next call reloads it
+    entries = tuple(EmployeeEntry(*row) for row in session.query(
+        Employee.id, Employee.name, Employee.department, Employee.basic_salary,
+    ).filter(Employee.organization == organization).order_by(Employee.id))
+    with _lock:
+        _directories[organization] = (version, entries)
+        _directories.move_to_end(organization)
+        while len(_directories) > MAX_CACHED_ORGANIZATIONS:
+            _directories.popitem(last=False)
+    return entries
+
+def find_employee(entries, name):
+    """First entry with the given name, or None."""
+    return next((entry for entry in entries if entry.name == name), None)
+
+def invalidate_directory(organization):
+    """Call after committing any change to an organization's employees."""
+    bump_version(DIRECTORY_SCOPE, organization)
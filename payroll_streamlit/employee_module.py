@@ -1,10 +1,42 @@
 import streamlit as st
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+from sqlalchemy import or_, text
 from sqlalchemy.exc import IntegrityError
-from connection import engine
+from connection import session_scope
 from db_setup import Employee, Attendance 
-
-Session = sessionmaker(bind=engine)
+from payslip_ledger import mark_employee_dirty, delete_employee_payslips
+from attendance_bitmap import delete_employee_bitmaps
+from directory_cache import invalidate_directory
+
+PAGE_SIZE = 25
+# The trigram index needs at least three characters to match anything
+MIN_FTS_TERM_LENGTH = 3
+
+@lru_cache(maxsize=None)
+def _has_search_index(bind):
+    with bind.connect() as conn:
+        return conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'employees_fts'")).first() is not None
+
+def search_employees(session, organization, search_term, page=0, page_size=PAGE_SIZE):
+    """Return one page of an organization's employees matching `search_term`
+    (case-insensitive substring of name or department) and the total match count."""
+    query = session.query(Employee).filter(Employee.organization == organization)
+    if search_term:
+        if len(search_term) >= MIN_FTS_TERM_LENGTH and _has_search_index(session.get_bind()):
+            phrase = '"' + search_term.replace('"', '""') + '"'
+            query = query.filter(Employee.id.in_(
+                text("SELECT rowid FROM employees_fts WHERE employees_fts MATCH :phrase").bindparams(phrase=phrase)
+            ))
+        else:
+            escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            query = query.filter(or_(
+                Employee.name.ilike(pattern, escape="\\"),
+                Employee.department.ilike(pattern, escape="\\"),
+            ))
+    total = query.count()
+    employees = query.order_by(Employee.name, Employee.id).limit(page_size).offset(page * page_size).all()
+    return employees, total
 
 def employee_page():
     st.title("Employee Management")
@@ -18,118 +50,139 @@ def employee_page():
         st.error("Organization info missing. Please login again.")
         return
 
-    session = Session()
-    employees = session.query(Employee).filter(Employee.organization == organization).all()
+    with session_scope(organization) as session:
+        st.subheader(f"Employees in {organization}")
+
+        search_term = st.text_input("Search employees by name or department").strip()
+        if st.session_state.get('employee_search_term') != search_term:
+            st.session_state['employee_search_term'] = search_term
+            st.session_state['employee_page'] = 0
+        page = st.session_state.get('employee_page', 0)
+
+        filtered_employees, total = search_employees(session, organization, search_term, page)
+        page_count = max(1, -(-total // PAGE_SIZE))
+        if page >= page_count:
+            page = st.session_state['employee_page'] = page_count - 1
+            filtered_employees, total = search_employees(session, organization, search_term, page)
+
+        if filtered_employees:
+            for emp in filtered_employees:
+                col1, col2, col3, col4, col5 = st.columns([3, 3, 3, 2, 2])
+                col1.write(emp.name)
+                col2.write(emp.department)
+                col3.write(f"{emp.basic_salary:.2f}")
+
+                if col4.button("Edit", key=f"edit_{emp.id}"):
+                    st.session_state['edit_employee_id'] = emp.id
+                    st.rerun()
 
-    st.subheader(f"Employees in {organization}")
+                delete_key = f"delete_confirm_{emp.id}"
+                if delete_key not in st.session_state:
+                    if col5.button("Delete", key=f"delete_{emp.id}"):
+                        st.session_state[delete_key] = True
+                        st.rerun()
+                else:
+                    st.warning(f"Confirm delete employee '{emp.name}'?")
+                    confirm_col, cancel_col = st.columns(2)
+                    if confirm_col.button("Yes", key=f"confirm_{emp.id}"):
+                        try:
 
-    search_term = st.text_input("Search employees by name").strip().lower()
-    filtered_employees = [emp for emp in employees if search_term in emp.name.lower()] if search_term else employees
+                            session.query(Attendance).filter_by(employee_id=emp.id).delete()
+                            delete_employee_payslips(session, emp.id)
+                            delete_employee_bitmaps(session, emp.id)
 
-    if filtered_employees:
-        for emp in filtered_employees:
-            col1, col2, col3, col4, col5 = st.columns([3, 3, 3, 2, 2])
-            col1.write(emp.name)
-            col2.write(emp.department)
-            col3.write(f"{emp.basic_salary:.2f}")
 
-            if col4.button("Edit", key=f"edit_{emp.id}"):
-                st.session_state['edit_employee_id'] = emp.id
-                st.rerun()
+                            session.delete(emp)
+                            session.commit()
+                            invalidate_directory(organization)
 
-            delete_key = f"delete_confirm_{emp.id}"
-            if delete_key not in st.session_state:
-                if col5.button("Delete", key=f"delete_{emp.id}"):
-                    st.session_state[delete_key] = True
-                    st.rerun()
-            else:
-                st.warning(f"Confirm delete employee '{emp.name}'?")
-                confirm_col, cancel_col = st.columns(2)
-                if confirm_col.button("Yes", key=f"confirm_{emp.id}"):
-                    try:
-                        
-                        session.query(Attendance).filter_by(employee_id=emp.id).delete()
-
-                        
-                        session.delete(emp)
-                        session.commit()
+                            st.success(f"Deleted employee '{emp.name}' successfully.")
+                        except Exception as e:
+                            session.rollback()
+                            st.error(f"Failed to delete employee '{emp.name}': {str(e)}")
 
-                        st.success(f"Deleted employee '{emp.name}' successfully.")
-                    except Exception as e:
-                        session.rollback()
-                        st.error(f"Failed to delete employee '{emp.name}': {str(e)}")
+                        del st.session_state[delete_key]
+                        st.rerun()
 
-                    del st.session_state[delete_key]
-                    st.rerun()
+                    if cancel_col.button("No", key=f"cancel_{emp.id}"):
+                        del st.session_state[delete_key]
+                        st.rerun()
 
-                if cancel_col.button("No", key=f"cancel_{emp.id}"):
-                    del st.session_state[delete_key]
+            prev_col, info_col, next_col = st.columns([2, 6, 2])
+            if prev_col.button("Previous", disabled=page == 0):
+                st.session_state['employee_page'] = page - 1
+                st.rerun()
+            info_col.write(f"Page {page + 1} of {page_count} ({total} employees)")
+            if next_col.button("Next", disabled=page + 1 >= page_count):
+                st.session_state['employee_page'] = page + 1
+                st.rerun()
+        else:
+            st.info("No employees found for your organization.")
+
+        if 'edit_employee_id' in st.session_state:
+            emp_id = st.session_state['edit_employee_id']
+            emp_to_edit = session.query(Employee).filter(Employee.id == emp_id).first()
+            if emp_to_edit:
+                st.markdown("---")
+                st.subheader(f"Edit Employee: {emp_to_edit.name}")
+
+                with st.form("edit_employee_form"):
+                    new_name = st.text_input("Employee Name", value=emp_to_edit.name)
+                    new_department = st.text_input("Department", value=emp_to_edit.department)
+                    new_basic_salary = st.number_input("Basic Salary", value=emp_to_edit.basic_salary, min_value=0.0, step=100.0)
+
+                    submitted = st.form_submit_button("Update")
+
+                    if submitted:
+                        if not new_name.strip():
+                            st.error("Employee name cannot be empty.")
+                        elif not new_department.strip():
+                            st.error("Department cannot be empty.")
+                        elif new_basic_salary <= 0:
+                            st.error("Basic salary must be greater than 0.")
+                        else:
+                            if new_basic_salary != emp_to_edit.basic_salary:
+                                mark_employee_dirty(session, emp_to_edit.id)
+                            emp_to_edit.name = new_name.strip()
+                            emp_to_edit.department = new_department.strip()
+                            emp_to_edit.basic_salary = new_basic_salary
+                            session.commit()
+                            invalidate_directory(organization)
+                            st.success("Employee updated successfully.")
+                            del st.session_state['edit_employee_id']
+                            st.rerun()
+
+                if st.button("Cancel"):
+                    del st.session_state['edit_employee_id']
                     st.rerun()
-    else:
-        st.info("No employees found for your organization.")
 
-    if 'edit_employee_id' in st.session_state:
-        emp_id = st.session_state['edit_employee_id']
-        emp_to_edit = session.query(Employee).filter(Employee.id == emp_id).first()
-        if emp_to_edit:
+        else:
             st.markdown("---")
-            st.subheader(f"Edit Employee: {emp_to_edit.name}")
+            st.subheader("Add New Employee")
 
-            with st.form("edit_employee_form"):
-                new_name = st.text_input("Employee Name", value=emp_to_edit.name)
-                new_department = st.text_input("Department", value=emp_to_edit.department)
-                new_basic_salary = st.number_input("Basic Salary", value=emp_to_edit.basic_salary, min_value=0.0, step=100.0)
+            with st.form("add_employee_form", clear_on_submit=True):
+                name = st.text_input("Employee Name")
+                department = st.text_input("Department")
+                basic_salary = st.number_input("Basic Salary", min_value=0.0, step=100.0)
 
-                submitted = st.form_submit_button("Update")
+                submitted = st.form_submit_button("Add Employee")
 
                 if submitted:
-                    if not new_name.strip():
+                    if not name.strip():
                         st.error("Employee name cannot be empty.")
-                    elif not new_department.strip():
+                    elif not department.strip():
                         st.error("Department cannot be empty.")
-                    elif new_basic_salary <= 0:
+                    elif basic_salary <= 0:
                         st.error("Basic salary must be greater than 0.")
                     else:
-                        emp_to_edit.name = new_name.strip()
-                        emp_to_edit.department = new_department.strip()
-                        emp_to_edit.basic_salary = new_basic_salary
+                        new_employee = Employee(
+                            name=name.strip(),
+                            department=department.strip(),
+                            basic_salary=basic_salary,
+                            organization=organization
+                        )
+                        session.add(new_employee)
                         session.commit()
-                        st.success("Employee updated successfully.")
-                        del st.session_state['edit_employee_id']
+                        invalidate_directory(organization)
+                        st.success(f"Employee '{name}' added successfully to {department} department.")
                         st.rerun()
-
-            if st.button("Cancel"):
-                del st.session_state['edit_employee_id']
-                st.rerun()
-
-    else:
-        st.markdown("---")
-        st.subheader("Add New Employee")
-
-        with st.form("add_employee_form", clear_on_submit=True):
-            name = st.text_input("Employee Name")
-            department = st.text_input("Department")
-            basic_salary = st.number_input("Basic Salary", min_value=0.0, step=100.0)
-
-            submitted = st.form_submit_button("Add Employee")
-
-            if submitted:
-                if not name.strip():
-                    st.error("Employee name cannot be empty.")
-                elif not department.strip():
-                    st.error("Department cannot be empty.")
-                elif basic_salary <= 0:
-                    st.error("Basic salary must be greater than 0.")
-                else:
-                    new_employee = Employee(
-                        name=name.strip(),
-                        department=department.strip(),
-                        basic_salary=basic_salary,
-                        organization=organization
-                    )
-                    session.add(new_employee)
-                    session.commit()
-                    st.success(f"Employee '{name}' added successfully to {department} department.")
-                    st.rerun()
-
-    session.close()
@@ -0,0 +1,149 @@
+import io
+import re
+import tempfile
+import zipfile
+from datetime import date
+
+import streamlit as st
+
+from connection import session_scope
+from db_setup import Employee
+from payslip_ledger import get_payslips
+from salary_rules import DEFAULT_COMPILED, load_rules, percent
+
+CHUNK_SIZE = 1000
+# Spool up to this many bytes in memory before the download file moves to disk
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+REGISTER_COLUMNS = [
+    'employee_id', 'name', 'department', 'basic_salary', 'days_present', 'total_workdays',
+    'attendance_percentage', 'basic_pay', 'hra', 'da', 'bonus', 'penalty_amount',
+    'deductions', 'gross_salary', 'tax', 'net_salary',
+]
+
+def iter_payslip_chunks(organization, year, month, chunk_size=CHUNK_SIZE, today=None):
+    """Yield the month's payslips as DataFrames of at most `chunk_size` employees.
+
+    Employees are paged by id (keyset), so only one chunk is held at a time.
+    """
+    last_id = 0
+    with session_scope(organization) as session:
+        while True:
+            ids = [row[0] for row in session.query(Employee.id).filter(
+                Employee.organization == organization,
+                Employee.id > last_id,
+            ).order_by(Employee.id).limit(chunk_size).all()]
+            if not ids:
+                return
+            yield get_payslips(session, organization, year, month, employee_ids=ids, today=today)
+            last_id = ids[-1]
+
+def iter_register_csv(chunks):
+    """Stream a payslip register as CSV bytes, one piece per chunk."""
+    header = True
+    for chunk in chunks:
+        yield chunk.to_csv(columns=REGISTER_COLUMNS, header=header, index=False, float_format='%.2f').encode('utf-8')
+        header = False
+    if header:
+        yield (','.join(REGISTER_COLUMNS) + '\n').encode('utf-8')
+
+def render_payslip_text(payslip, period, rules=DEFAULT_COMPILED):
+    """Plain-text payslip with the same lines as the payslip page."""
+    lines = [
+        f"Payslip for {payslip['name']} - {period}",
+        f"Department: {payslip['department']}",
+        "",
+        f"Basic Salary (pro-rata): ₹{payslip['basic_pay']:.2f}",
+        f"HRA ({percent(rules.config['hra_rate'])} of Basic): ₹{payslip['hra']:.2f}",
+        f"DA ({percent(rules.config['da_rate'])} of Basic): ₹{payslip['da']:.2f}",
+        f"Attendance: {int(payslip['days_present'])} / {int(payslip['total_workdays'])} days "
+        f"({payslip['attendance_percentage']:.2f}%)",
+        f"Bonus: ₹{payslip['bonus']:.2f}",
+    ]
+    if payslip['penalty_applied']:
+        lines.append(f"Attendance penalty: -₹{payslip['penalty_amount']:.2f}")
+    lines += [
+        f"Deductions: ₹{payslip['deductions']:.2f}",
+        f"Gross Salary: ₹{payslip['gross_salary']:.2f}",
+        f"Tax: -₹{payslip['tax']:.2f}",
+        f"Net Salary (Payable): ₹{payslip['net_salary']:.2f}",
+    ]
+    return "\n".join(lines) + "\n"
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands written bytes back out in pieces."""
+
+    def __init__(self):
+        super().__init__()
+        self._pieces = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._pieces.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._pieces)
+        self._pieces.clear()
+        return data
+
+def _safe_filename(name):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or 'employee'
+
+def iter_payslip_zip(chunks, period, rules=DEFAULT_COMPILED):
+    """Stream a ZIP archive with one text payslip per employee."""
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for chunk in chunks:
+            for payslip in chunk.to_dict('records'):
+                filename = f"{payslip['employee_id']}_{_safe_filename(payslip['name'])}.txt"
+                archive.writestr(filename, render_payslip_text(payslip, period, rules))
+            yield buffer.drain()
+    yield buffer.drain()
+
+def spool(pieces):
+    """Write a byte stream to a temporary file and return it rewound.
+
+    This does not stream the download: st.download_button reads the whole file
+    and Streamlit keeps the bytes in memory until the browser fetches them. The
+    chunked generators only keep the payslip DataFrames to one chunk at a time.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    for piece in pieces:
+        spooled.write(piece)
+    spooled.seek(0)
+    return spooled
+
+def organization_rules(organization):
+    with session_scope(organization) as session:
+        return load_rules(session, organization)
+
+def export_section(organization, year, month):
+    """Download buttons for the organization's payslip register and per-employee slips.
+
+    Each file is built in full when its button is clicked (see spool); the
+    payslips are computed a chunk at a time but the finished file is held in memory.
+    """
+    period = date(year, month, 1).strftime('%B %Y')
+    slug = f"{_safe_filename(organization)}_{year}-{month:02d}"
+
+    st.subheader(f"Export payslips for {organization} - {period}")
+    st.caption("Files are generated when you click a button.")
+    register_col, slips_col = st.columns(2)
+    register_col.download_button(
+        "Download CSV register",
+        data=lambda: spool(iter_register_csv(iter_payslip_chunks(organization, year, month))),
+        file_name=f"payslips_{slug}.csv",
+        mime="text/csv",
+        on_click="ignore",
+    )
+    slips_col.download_button(
+        "Download payslips (ZIP)",
+        data=lambda: spool(iter_payslip_zip(iter_payslip_chunks(organization, year, month), period,
+                                            organization_rules(organization))),
+        file_name=f"payslips_{slug}.zip",
+        mime="application/zip",
+        on_click="ignore",
+    )
@@ -0,0 +1,274 @@
+import time
+from collections import namedtuple
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import insert, update
+
+from connection import session_scope
+from db_setup import Employee
+from attendance_module import upsert_attendance
+from payslip_ledger import mark_employees_dirty
+from directory_cache import invalidate_directory
+from attendance_bitmap import day_bit, invalidate_attendance
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+EMPLOYEE_COLUMNS = ["name", "department", "basic_salary"]
+ATTENDANCE_COLUMNS = ["name", "date", "is_present"]
+
+# Header spellings accepted for each canonical column
+COLUMN_ALIASES = {
+    "employee": "name",
+    "employee_name": "name",
+    "dept": "department",
+    "salary": "basic_salary",
+    "present": "is_present",
+    "status": "is_present",
+    "attendance": "is_present",
+}
+
+PRESENT_VALUES = {"1", "true", "yes", "y", "p", "present"}
+ABSENT_VALUES = {"0", "false", "no", "n", "a", "absent"}
+
+ImportResult = namedtuple("ImportResult", ["rows", "inserted", "updated", "unchanged", "rejected", "errors", "seconds"])
+
+def rows_per_second(result):
+    return result.rows / result.seconds if result.seconds > 0 else 0.0
+
+def _normalize_header(header):
+    key = str(header).strip().lower().replace(" ", "_")
+    return COLUMN_ALIASES.get(key, key)
+
+def iter_chunks(file, filename, chunk_size=CHUNK_SIZE):
+    """Yield DataFrames of at most `chunk_size` rows (all values as strings) from a CSV or XLSX file."""
+    if filename.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Reading .xlsx files requires the openpyxl package.")
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [_normalize_header(h) for h in next(rows, [])]
+            batch = []
+            for row in rows:
+                batch.append(["" if v is None else str(v) for v in row])
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+    else:
+        for chunk in pd.read_csv(file, chunksize=chunk_size, dtype=str, keep_default_na=False, skipinitialspace=True):
+            chunk.columns = [_normalize_header(c) for c in chunk.columns]
+            yield chunk
+
+def _check_columns(chunk, required):
+    missing = [c for c in required if c not in chunk.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+def _reject(errors, rejected_rows, first_row, reason):
+    for row_number in rejected_rows:
+        if len(errors) >= MAX_REPORTED_ERRORS:
+            break
+        errors.append(f"Row {first_row + row_number}: {reason}")
+
+def _validate_employees(chunk, first_row, errors):
+    # Same rules as the "Add New Employee" form
+    df = pd.DataFrame({
+        "name": chunk["name"].str.strip(),
+        "department": chunk["department"].str.strip(),
+        "basic_salary": pd.to_numeric(chunk["basic_salary"], errors="coerce"),
+    })
+    checks = [
+        (df["name"] == "", "Employee name cannot be empty."),
+        (df["department"] == "", "Department cannot be empty."),
+        (~(df["basic_salary"] > 0), "Basic salary must be greater than 0."),
+    ]
+    invalid = pd.Series(False, index=df.index)
+    for mask, reason in checks:
+        mask = mask & ~invalid
+        _reject(errors, mask[mask].index, first_row, reason)
+        invalid |= mask
+    return df[~invalid], int(invalid.sum())
+
+def _validate_attendance(chunk, first_row, errors):
+    status = chunk["is_present"].str.strip().str.lower()
+    df = pd.DataFrame({
+        "name": chunk["name"].str.strip(),
+        "date": pd.to_datetime(chunk["date"].str.strip(), errors="coerce").dt.date,
+        "is_present": status.isin(PRESENT_VALUES),
+    })
+    checks = [
+        (df["name"] == "", "Employee name cannot be empty."),
+        (df["date"].isna(), "Date is not a valid date."),
+        (~status.isin(PRESENT_VALUES | ABSENT_VALUES), "Attendance must be present/absent (1/0, yes/no, P/A)."),
+    ]
+    invalid = pd.Series(False, index=df.index)
+    for mask, reason in checks:
+        mask = mask & ~invalid
+        _reject(errors, mask[mask].index, first_row, reason)
+        invalid |= mask
+    # Sundays can't be marked present on the attendance calendar either
+    sunday = ~invalid & df["is_present"] & df["date"].map(lambda d: d is not None and d == d and d.weekday() == 6)
+    _reject(errors, sunday[sunday].index, first_row, "Sunday is not a workday.")
+    invalid |= sunday
+    return df[~invalid], int(invalid.sum())
+
+def _reject_duplicates(duplicate, first_row, errors):
+    _reject(errors, duplicate[duplicate].index, first_row, "Duplicate of an earlier row in the file.")
+    return int(duplicate.sum())
+
+def _resolve_employees(session, organization, names):
+    """Map employee names to (id, department, basic_salary) with one query; the
+    oldest record wins for duplicates."""
+    rows = session.query(Employee.id, Employee.name, Employee.department, Employee.basic_salary).filter(
+        Employee.organization == organization,
+        Employee.name.in_(list(names)),
+    ).order_by(Employee.id.desc()).all()
+    return {name: (employee_id, department, salary) for employee_id, name, department, salary in rows}
+
+def import_employees(file, filename, organization, chunk_size=CHUNK_SIZE):
+    """Stream an HR master list into the organization's employees.
+
+    Rows are matched by name: existing employees get their department and salary
+    updated, new names are inserted and rows that change nothing are skipped. A
+    name repeated later in the file is rejected. Each chunk is written in its own
+    transaction.
+    """
+    start = time.perf_counter()
+    rows = inserted = updated = unchanged = rejected = 0
+    errors = []
+    seen = set()
+    with session_scope(organization) as session:
+        for chunk in iter_chunks(file, filename, chunk_size):
+            _check_columns(chunk, EMPLOYEE_COLUMNS)
+            first_row = rows + 2  # 1-based, after the header line
+            rows += len(chunk)
+            valid, bad = _validate_employees(chunk.reset_index(drop=True), first_row, errors)
+            rejected += bad
+            duplicate = valid["name"].duplicated() | valid["name"].isin(seen)
+            rejected += _reject_duplicates(duplicate, first_row, errors)
+            valid = valid[~duplicate]
+            seen.update(valid["name"])
+            if valid.empty:
+                continue
+
+            existing = _resolve_employees(session, organization, valid["name"])
+            new_rows, changed_rows, repriced = [], [], []
+            for record in valid.to_dict("records"):
+                match = existing.get(record["name"])
+                if match is None:
+                    new_rows.append(dict(record, organization=organization))
+                    continue
+                employee_id, department, salary = match
+                if record["department"] == department and record["basic_salary"] == salary:
+                    unchanged += 1
+                    continue
+                changed_rows.append(dict(record, id=employee_id))
+                if record["basic_salary"] != salary:
+                    repriced.append(employee_id)
+
+            if new_rows:
+                session.execute(insert(Employee), new_rows)
+            if changed_rows:
+                session.execute(update(Employee), changed_rows)
+            if repriced:
+                mark_employees_dirty(session, repriced)
+            session.commit()
+            if new_rows or changed_rows:
+                invalidate_directory(organization)
+            inserted += len(new_rows)
+            updated += len(changed_rows)
+    return ImportResult(rows, inserted, updated, unchanged, rejected, errors, time.perf_counter() - start)
+
+def import_attendance(file, filename, organization, chunk_size=CHUNK_SIZE):
+    """Stream an attendance export (name, date, present) into the attendance table.
+
+    Employees are resolved by (organization, name); unknown names and days
+    repeated later in the file are rejected. Each chunk is upserted in its own
+    transaction.
+    """
+    start = time.perf_counter()
+    rows = written = rejected = 0
+    errors = []
+    employee_ids = {}
+    seen_days = {}  # (employee_id, year, month) -> bitmask of the days already imported
+    with session_scope(organization) as session:
+        for chunk in iter_chunks(file, filename, chunk_size):
+            _check_columns(chunk, ATTENDANCE_COLUMNS)
+            first_row = rows + 2
+            rows += len(chunk)
+            valid, bad = _validate_attendance(chunk.reset_index(drop=True), first_row, errors)
+            rejected += bad
+
+            unresolved = set(valid["name"]) - employee_ids.keys()
+            if unresolved:
+                resolved = _resolve_employees(session, organization, unresolved)
+                employee_ids.update({name: resolved[name][0] if name in resolved else None for name in unresolved})
+            ids = valid["name"].map(employee_ids)
+            unknown = ids.isna()
+            _reject(errors, unknown[unknown].index, first_row, "Employee not found in the database.")
+            rejected += int(unknown.sum())
+
+            valid = valid.assign(employee_id=ids)[~unknown]
+            records, duplicate = [], pd.Series(False, index=valid.index)
+            for index, r in zip(valid.index, valid.itertuples(index=False)):
+                key, bit = (int(r.employee_id), r.date.year, r.date.month), day_bit(r.date)
+                if seen_days.get(key, 0) & bit:
+                    duplicate[index] = True
+                    continue
+                seen_days[key] = seen_days.get(key, 0) | bit
+                records.append({"employee_id": key[0], "date": r.date, "is_present": bool(r.is_present)})
+            rejected += _reject_duplicates(duplicate, first_row, errors)
+            upsert_attendance(session, records)
+            session.commit()
+            invalidate_attendance(organization)
+            written += len(records)
+    return ImportResult(rows, written, 0, 0, rejected, errors, time.perf_counter() - start)
+
+def import_page():
+    if not st.session_state.get('is_logged_in', False):
+        st.warning("Please login first in 'Login / Sign Up' tab.")
+        return
+
+    organization = st.session_state.get('organization')
+    if not organization:
+        st.error("Organization info missing. Please login again.")
+        return
+
+    st.title("Bulk Import")
+
+    kind = st.radio("What are you importing?", ["Employees", "Attendance"], horizontal=True)
+    if kind == "Employees":
+        st.caption("Columns: name, department, basic_salary. Existing employees are matched by name and updated; "
+                   "a name repeated in the file is rejected.")
+    else:
+        st.caption("Columns: name, date (YYYY-MM-DD), is_present (1/0, yes/no, P/A). One row per employee per day.")
+
+    uploaded = st.file_uploader("Upload a CSV or Excel file", type=["csv", "xlsx"])
+    if uploaded is None or not st.button("Import"):
+        return
+
+    importer = import_employees if kind == "Employees" else import_attendance
+    try:
+        with st.spinner("Importing..."):
+            result = importer(uploaded, uploaded.name, organization)
+    except ValueError as e:
+        st.error(f"Import failed: {e}")
+        return
+
+    if kind == "Employees":
+        st.success(f"Imported {result.rows} rows: {result.inserted} added, {result.updated} updated, "
+                   f"{result.unchanged} unchanged, {result.rejected} rejected.")
+    else:
+        st.success(f"Imported {result.rows} rows: {result.inserted} attendance days saved, {result.rejected} rejected.")
+    st.write(f"Finished in {result.seconds:.2f}s ({rows_per_second(result):,.0f} rows/sec).")
+    if result.errors:
+        with st.expander(f"Rejected rows (showing up to {MAX_REPORTED_ERRORS})"):
+            st.write("\n".join(f"- {error}" for error in result.errors))
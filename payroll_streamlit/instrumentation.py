@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import heapq
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import streamlit as st
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger("payroll.slow_query")
+
+SLOW_QUERY_MS = float(os.environ.get("PAYROLL_SLOW_QUERY_MS", "100"))
+SLOWEST_KEPT = 5
+STATEMENT_PREVIEW_CHARS = 300
+
+_current_page = ContextVar("current_page", default=None)
+
+class PageStats:
+    """SQL statements issued while one page rendered."""
+
+    def __init__(self, name):
+        self.name = name
+        self.query_count = 0
+        self.db_ms = 0.0
+        self.wall_ms = 0.0
+        self._slowest = []  # min-heap of (ms, seq, statement)
+
+    def record(self, statement, elapsed_ms):
+        self.query_count += 1
+        self.db_ms += elapsed_ms
+        entry = (elapsed_ms, self.query_count, statement[:STATEMENT_PREVIEW_CHARS])
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        return [(ms, statement) for ms, _, statement in sorted(self._slowest, reverse=True)]
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+    page = _current_page.get()
+    if page is not None:
+        page.record(statement, elapsed_ms)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "page": page.name if page else None,
+            "ms": round(elapsed_ms, 2),
+            "executemany": executemany,
+            "statement": " ".join(statement.split())[:STATEMENT_PREVIEW_CHARS],
+        }))
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't fire for failed statements
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+def instrument(engine):
+    """Attach the timing hooks to an engine (safe to call more than once)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+@contextmanager
+def track_page(name, collected=None):
+    """Attribute every SQL statement run inside the block to page `name`.
+
+    The finished PageStats is appended to `collected` when given.
+    """
+    stats = PageStats(name)
+    token = _current_page.set(stats)
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.wall_ms = (time.perf_counter() - start) * 1000
+        _current_page.reset(token)
+        if collected is not None:
+            collected.append(stats)
+
+def render_debug_panel(collected):
+    """Sidebar summary of the SQL issued by each page in this rerun."""
+    st.markdown("### 🐞 SQL debug")
+    st.caption(f"Statements slower than {SLOW_QUERY_MS:.0f} ms are logged to '{slow_query_logger.name}'.")
+    if not collected:
+        st.write("No queries recorded in this rerun.")
+        return
+    for stats in collected:
+        st.write(f"**{stats.name}**: {stats.query_count} queries, "
+                 f"{stats.db_ms:.1f} ms in the database, {stats.wall_ms:.1f} ms total")
+        for ms, statement in stats.slowest:
+            st.code(f"{ms:.2f} ms  {statement}", language="sql")
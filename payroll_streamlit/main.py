@@ -1,15 +1,10 @@
-import os
-import base64
+import importlib
 import streamlit as st
+from assets import asset_url, LOGO, BACKGROUND
 
 # page config
 st.set_page_config(page_title="Payroll Management System", layout="centered")
 
-# Paths
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-logo_path = os.path.join(BASE_DIR, "tp2-removebg-preview.png")
-background_path = os.path.join(BASE_DIR, "background.jpg")
-
 #  Session State Initialization 
 if 'is_logged_in' not in st.session_state:
     st.session_state.is_logged_in = False
@@ -18,24 +13,56 @@ if 'username' not in st.session_state:
 if 'organization' not in st.session_state:
     st.session_state.organization = None
 
-# Import  page modules
-from employee_module import employee_page
-from attendance_module import attendance_page
-from payslip_module import payslip_page
+# Create or upgrade the database schema once per process
+@st.cache_resource
+def prepare_database():
+    from setup import setup_database
+    return setup_database()
+
+prepare_database()
+
+# Deliver contact messages queued before a restart without waiting for a new one
+@st.cache_resource
+def start_outbox():
+    from outbox import get_outbox_worker
+    return get_outbox_worker()
+
+start_outbox()
+
+from connection import on_new_engine
+from instrumentation import instrument, track_page, render_debug_panel
+
+# Time every SQL statement and attribute it to the page being rendered
+on_new_engine(instrument)
+page_stats = []
+
+# Only the login page is imported up front. The other sections pull in pandas,
+# plotly and the attendance calendar, so they are imported the first time they
+# are opened (Python keeps them in sys.modules after that).
 from auth_module import auth_page
-from contact_module import contact_page
 
-# Set background image
-def set_bg_image(image_path):
-    if os.path.exists(image_path):
-        with open(image_path, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode()
+SECTION_PAGES = {
+    "Employee": ("employee_module", "employee_page"),
+    "Attendance": ("attendance_module", "attendance_page"),
+    "Payslip": ("payslip_module", "payslip_page"),
+    "Analytics": ("analytics_module", "analytics_page"),
+    "Import": ("import_module", "import_page"),
+    "Contact Us": ("contact_module", "contact_page"),
+}
+
+def load_page(section):
+    module_name, function_name = SECTION_PAGES[section]
+    return getattr(importlib.import_module(module_name), function_name)
 
+# Set background image
+def set_bg_image(name):
+    image_url = asset_url(name)
+    if image_url:
         st.markdown(
             f"""
             <style>
             .stApp {{
-                background-image: url("data:image/jpg;base64,{encoded_string}");
+                background-image: url("{image_url}");
                 background-size: cover;
                 background-position: center;
                 background-repeat: no-repeat;
@@ -47,7 +74,7 @@ def set_bg_image(image_path):
         )
 
 # Set background for all pages 
-set_bg_image(background_path)
+set_bg_image(BACKGROUND)
 
 # Show login page 
 if not st.session_state.is_logged_in:
@@ -82,11 +109,10 @@ if not st.session_state.is_logged_in:
     st.markdown(login_style, unsafe_allow_html=True)
     st.markdown('<div class="login-container">', unsafe_allow_html=True)
 
-    if os.path.exists(logo_path):
-        with open(logo_path, "rb") as logo_file:
-            encoded_logo = base64.b64encode(logo_file.read()).decode()
+    logo_url = asset_url(LOGO)
+    if logo_url:
         st.markdown(
-            f'<img class="logo-img" src="data:image/png;base64,{encoded_logo}" alt="Logo" />',
+            f'<img class="logo-img" src="{logo_url}" alt="Logo" />',
             unsafe_allow_html=True,
         )
 
@@ -97,23 +123,24 @@ if not st.session_state.is_logged_in:
     """, unsafe_allow_html=True)
 
 
-    auth_page()
+    with track_page("auth_page", page_stats):
+        auth_page()
     st.markdown('</div>', unsafe_allow_html=True)
     st.stop()
 
 #  After login, show logo at top on every page 
-if os.path.exists(logo_path):
-    with open(logo_path, "rb") as logo_file:
-        encoded_logo = base64.b64encode(logo_file.read()).decode()
+logo_url = asset_url(LOGO)
+if logo_url:
     st.markdown(
-        f'<img src="data:image/png;base64,{encoded_logo}" alt="Logo" style="max-width: 200px; display: block; margin-left: auto; margin-right: auto; margin-bottom: 20px;" />',
+        f'<img src="{logo_url}" alt="Logo" style="max-width: 200px; display: block; margin-left: auto; margin-right: auto; margin-bottom: 20px;" />',
         unsafe_allow_html=True,
     )
 
 #  Sidebar and content after login 
 with st.sidebar:
     st.title("📂 Navigation")
-    menu = st.selectbox("Choose Section", ["Home", "Employee", "Attendance", "Payslip", "Contact Us"])
+    menu = st.selectbox("Choose Section", ["Home", "Employee", "Attendance", "Payslip", "Analytics", "Import", "Contact Us"])
+    show_sql_debug = st.checkbox("Show SQL debug panel", key="show_sql_debug")
 
     if st.button("🔒 Logout"):
         st.session_state.is_logged_in = False
@@ -142,6 +169,7 @@ if menu == "Home":
                     <li>🧑‍💼 Manage Employees</li>
                     <li>📅 Mark Attendance</li>
                     <li>🧾 Generate Payslips</li>
+                    <li>📊 Track department trends</li>
                 </ul>
             </p>
             <p style="font-style: italic; color:#555;">
@@ -155,17 +183,14 @@ if menu == "Home":
     st.markdown("---")
 
 
-elif menu == "Employee":
-    employee_page()
-
-elif menu == "Attendance":
-    attendance_page()
-
-elif menu == "Payslip":
-    payslip_page()
+elif menu in SECTION_PAGES:
+    page = load_page(menu)
+    with track_page(SECTION_PAGES[menu][1], page_stats):
+        page()
 
-elif menu == "Contact Us":
-    contact_page()
+if show_sql_debug:
+    with st.sidebar:
+        render_debug_panel(page_stats)
 
 #  Footer 
 st.markdown("<hr>", unsafe_allow_html=True)
@@ -0,0 +1,190 @@
+import os
+import logging
+import smtplib
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+
+from sqlalchemy import or_
+
+from connection import session_scope
+from db_setup import ContactMessage
+
+logger = logging.getLogger(__name__)
+
+SmtpConfig = namedtuple("SmtpConfig", ["host", "port", "use_ssl", "username", "password", "sender", "receiver"])
+
+def smtp_config_from_env():
+    """SMTP settings from PAYROLL_SMTP_*; None (sending disabled) unless both
+    PAYROLL_SMTP_SENDER and PAYROLL_SMTP_RECEIVER are set."""
+    sender = os.environ.get("PAYROLL_SMTP_SENDER")
+    receiver = os.environ.get("PAYROLL_SMTP_RECEIVER")
+    if not (sender and receiver):
+        return None
+    return SmtpConfig(
+        host=os.environ.get("PAYROLL_SMTP_HOST", "smtp.gmail.com"),
+        port=int(os.environ.get("PAYROLL_SMTP_PORT", "465")),
+        use_ssl=os.environ.get("PAYROLL_SMTP_SSL", "1") == "1",
+        username=os.environ.get("PAYROLL_SMTP_USERNAME", sender),
+        password=os.environ.get("PAYROLL_SMTP_PASSWORD"),
+        sender=sender,
+        receiver=receiver,
+    )
+
+def build_message(config, name, email, message):
+    msg = MIMEText(f"Name: {name}\nEmail: {email}\n\nMessage:\n{message}")
+    msg['Subject'] = f"New Contact Message from {name}"
+    msg['From'] = config.sender
+    msg['To'] = config.receiver
+    return msg
+
+def _close_quietly(smtp):
+    if smtp is not None:
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+    return None
+
+class OutboxWorker(threading.Thread):
+    """Background thread that delivers pending contact messages.
+
+    Due messages are sent in batches over a single SMTP connection. A failed
+    message is retried with exponential backoff and marked failed after
+    `max_attempts`. When the server can't be reached the rest of the batch is
+    put off together, with a backoff that grows while the outage lasts, and
+    their attempts are not counted. Call `notify()` after queueing a message to
+    wake the worker.
+    """
+
+    def __init__(self, config=None, batch_size=20, poll_interval=30.0, max_attempts=5, backoff_seconds=30.0):
+        super().__init__(name="contact-outbox", daemon=True)
+        self.config = config or smtp_config_from_env()
+        if self.config is None:
+            raise ValueError("SMTP is not configured; set PAYROLL_SMTP_SENDER and PAYROLL_SMTP_RECEIVER")
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._connect_failures = 0
+        self._connect_retry_at = None
+
+    def notify(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Contact outbox batch failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def drain(self):
+        """Send batches until nothing is due. Returns the number of messages processed."""
+        total = 0
+        while not self._stopping.is_set():
+            processed = self.process_batch()
+            if not processed:
+                break
+            total += processed
+        return total
+
+    def _connect(self):
+        config = self.config
+        if config.use_ssl:
+            smtp = smtplib.SMTP_SSL(config.host, config.port, timeout=30)
+        else:
+            smtp = smtplib.SMTP(config.host, config.port, timeout=30)
+        if config.username and config.password:
+            smtp.login(config.username, config.password)
+        return smtp
+
+    def _postpone(self, messages, error, now):
+        """Put off messages that were not sent because the server was unreachable."""
+        self._connect_failures += 1
+        delay = self.backoff_seconds * 2 ** min(self._connect_failures - 1, 10)
+        self._connect_retry_at = now + timedelta(seconds=delay)
+        logger.warning("Cannot reach the SMTP server, retrying %s message(s) in %.0fs: %s", len(messages), delay, error)
+        for msg in messages:
+            msg.last_error = str(error)[:500]
+            msg.next_attempt_at = now + timedelta(seconds=delay)
+
+    def _record_failure(self, msg, error, now):
+        msg.last_error = str(error)[:500]
+        if msg.attempts >= self.max_attempts:
+            msg.status = 'failed'
+            logger.error("Giving up on contact message %s after %s attempts: %s", msg.id, msg.attempts, error)
+        else:
+            msg.next_attempt_at = now + timedelta(seconds=self.backoff_seconds * 2 ** (msg.attempts - 1))
+
+    def process_batch(self):
+        now = datetime.now()
+        if self._connect_retry_at is not None and now < self._connect_retry_at:
+            return 0
+        with session_scope() as session:
+            due = session.query(ContactMessage).filter(
+                ContactMessage.status == 'pending',
+                or_(ContactMessage.next_attempt_at.is_(None), ContactMessage.next_attempt_at <= now),
+            ).order_by(ContactMessage.id).limit(self.batch_size).all()
+            if not due:
+                return 0
+
+            smtp = None
+            try:
+                for index, msg in enumerate(due):
+                    if smtp is None:
+                        try:
+                            smtp = self._connect()
+                        except Exception as e:
+                            # One connect attempt per batch; stop instead of timing out on every message
+                            self._postpone(due[index:], e, now)
+                            return 0
+                        self._connect_failures = 0
+                        self._connect_retry_at = None
+                    msg.attempts += 1
+                    try:
+                        mime = build_message(self.config, msg.name, msg.email, msg.message)
+                        smtp.sendmail(self.config.sender, self.config.receiver, mime.as_string())
+                    except Exception as e:
+                        # Drop the connection on network errors so the next message reconnects
+                        if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                            smtp = _close_quietly(smtp)
+                        self._record_failure(msg, e, now)
+                    else:
+                        msg.status = 'sent'
+                        msg.sent_at = datetime.now()
+                        msg.last_error = None
+            finally:
+                _close_quietly(smtp)
+                session.commit()
+            return len(due)
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_outbox_worker():
+    """Return the process-wide outbox worker, starting it on first use.
+
+    Returns None when SMTP is not configured; messages then stay pending until
+    the app is restarted with the PAYROLL_SMTP_* settings.
+    """
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            config = smtp_config_from_env()
+            if config is None:
+                logger.warning("Contact e-mail is disabled: PAYROLL_SMTP_SENDER and PAYROLL_SMTP_RECEIVER are not set")
+                return None
+            _worker = OutboxWorker(config)
+            _worker.start()
+        return _worker
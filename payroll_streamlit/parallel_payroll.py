@@ -0,0 +1,154 @@
+"""Pay runs split across worker processes.
+
+    python -m payroll_streamlit run --org "xyz public school" --month 2026-09 --workers 4
+
+Employee ids are cut into contiguous shards, one per worker. Each worker opens
+its own read-only connection, loads its shard's employees and attendance
+bitmaps for every requested month in two queries, and runs compute_payslips on
+them, so the numbers are the payslip page's. Shards come back in id order and
+are sorted by (year, month, employee_id), which makes the result identical to
+the serial path whatever the worker count.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import pandas as pd
+from sqlalchemy.orm import sessionmaker
+
+from attendance_bitmap import popcount
+from connection import database_path, make_engine
+from db_setup import Employee, AttendanceMonth
+from payroll_engine import PAYSLIP_COLUMNS, compute_payslips
+from salary_rules import load_rules
+from workday_calendar import month_calendars
+
+RESULT_COLUMNS = ['year', 'month', *PAYSLIP_COLUMNS]
+
+_worker_session = None
+
+def month_range(first, last):
+    """Every (year, month) from `first` to `last` inclusive."""
+    year, month = first
+    months = []
+    while (year, month) <= last:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def shard_ranges(employee_ids, shards):
+    """Split sorted ids into at most `shards` contiguous (first_id, last_id) ranges."""
+    employee_ids = sorted(employee_ids)
+    shards = max(1, min(shards, len(employee_ids)))
+    size, extra = divmod(len(employee_ids), shards)
+    ranges, start = [], 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            ranges.append((employee_ids[start], employee_ids[end - 1]))
+        start = end
+    return ranges
+
+def _init_worker(db_path):
+    global _worker_session
+    engine = make_engine(db_path, readonly=True, pool_size=1, max_overflow=0)
+    _worker_session = sessionmaker(bind=engine)
+
+def compute_shard(session, organization, months, id_range, today=None):
+    """Payslips of the employees with ids in `id_range` for each of `months`."""
+    first_id, last_id = id_range
+    employees = pd.DataFrame(
+        session.query(Employee.id, Employee.name, Employee.department, Employee.basic_salary).filter(
+            Employee.organization == organization,
+            Employee.id.between(first_id, last_id),
+        ).order_by(Employee.id).all(),
+        columns=['employee_id', 'name', 'department', 'basic_salary'],
+    )
+    if employees.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    # One query for all months; the period filter is a range, the exact months are picked below
+    (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+    period = AttendanceMonth.year * 100 + AttendanceMonth.month
+    masks = pd.DataFrame(
+        session.query(AttendanceMonth.employee_id, AttendanceMonth.year, AttendanceMonth.month,
+                      AttendanceMonth.present_mask).filter(
+            AttendanceMonth.employee_id.between(first_id, last_id),
+            period.between(first_year * 100 + first_month, last_year * 100 + last_month),
+        ).all(),
+        columns=['employee_id', 'year', 'month', 'present_mask'],
+    )
+    masks_by_month = {key: group for key, group in masks.groupby(['year', 'month'])}
+    rules = load_rules(session, organization)
+    calendars = month_calendars(session, organization, months)
+
+    frames = []
+    for year, month in months:
+        workdays = calendars[(year, month)]
+        month_masks = masks_by_month.get((year, month))
+        if month_masks is None:
+            days_present = pd.Series(dtype='int64')
+        else:
+            days_present = pd.Series(
+                popcount(month_masks['present_mask'].to_numpy() & workdays.workday_mask),
+                index=month_masks['employee_id'].to_numpy(), dtype='int64',
+            )
+        payslips = compute_payslips(employees, days_present, year, month, today=today, rules=rules,
+                                    workdays=workdays)
+        payslips.insert(0, 'month', month)
+        payslips.insert(0, 'year', year)
+        frames.append(payslips)
+    return pd.concat(frames, ignore_index=True)
+
+def _run_shard(organization, months, id_range, today):
+    session = _worker_session()
+    try:
+        return compute_shard(session, organization, months, id_range, today)
+    finally:
+        session.close()
+
+def merge_shards(frames):
+    """Concatenate shard results in a fixed (year, month, employee_id) order."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.sort_values(['year', 'month', 'employee_id'], kind='stable', ignore_index=True)
+
+def run_payroll_parallel(organization, months, workers=None, db_path=None, today=None):
+    """Compute payslips for `months` (a list of (year, month)) across `workers` processes.
+
+    Reads `db_path`, or the organization's own database. With one worker
+    everything runs in this process.
+    """
+    workers = workers or os.cpu_count() or 1
+    months = sorted(set(months))
+    today = today or date.today()
+    db_path = db_path or database_path(organization, create=False)
+    if db_path is None:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    engine = make_engine(db_path, readonly=True, pool_size=1, max_overflow=0)
+    try:
+        Session = sessionmaker(bind=engine)
+        with Session() as session:
+            employee_ids = [row[0] for row in session.query(Employee.id).filter(
+                Employee.organization == organization).order_by(Employee.id)]
+            ranges = shard_ranges(employee_ids, workers)
+            if not months or not ranges:
+                return pd.DataFrame(columns=RESULT_COLUMNS)
+            if workers == 1:
+                return merge_shards([compute_shard(session, organization, months, r, today) for r in ranges])
+    finally:
+        engine.dispose()
+
+    # spawn, not fork: the parent may be a Streamlit server with live threads and connections
+    with ProcessPoolExecutor(
+        max_workers=len(ranges),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(db_path,),
+    ) as pool:
+        frames = list(pool.map(_run_shard, *zip(*[(organization, months, r, today) for r in ranges])))
+    return merge_shards(frames)
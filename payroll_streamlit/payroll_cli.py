@@ -0,0 +1,147 @@
+"""Headless payroll runs for scheduled jobs.
+
+    python -m payroll_streamlit run --org "xyz public school" --month 2026-09 --csv register.csv
+
+Computes the month's payslips for an organization with the same code as the
+app, stores them in the payslip ledger and optionally exports the CSV
+register and a ZIP of text payslips. Prints row counts, totals and timings.
+
+    python -m payroll_streamlit check-attendance --repair
+
+Compares the monthly attendance bitmaps, which pay runs read, with the daily
+attendance rows they are derived from, and rebuilds those that disagree.
+"""
+import argparse
+import os
+import sys
+import time
+
+from payroll_engine import parse_month
+
+def _timed(timings, name, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    timings[name] = time.perf_counter() - start
+    return result
+
+def _write(path, pieces):
+    with open(path, "wb") as f:
+        for piece in pieces:
+            f.write(piece)
+
+def run_command(args):
+    # Imported here so --db can point connection.py at another database first
+    import pandas as pd
+    from connection import database_path, session_scope
+    from setup import setup_database
+    from payslip_ledger import reserve_payslips, store_payslips
+    from parallel_payroll import run_payroll_parallel
+    from export_module import iter_payslip_chunks, iter_register_csv, iter_payslip_zip, organization_rules
+
+    year, month = args.month
+    period = f"{year}-{month:02d}"
+    timings = {}
+    _timed(timings, "setup", setup_database)
+    db_path = database_path(args.org, create=False)
+    if db_path is None:
+        print(f"No database found for {args.org!r}", file=sys.stderr)
+        return 1
+
+    if args.workers > 1:
+        # Before computing, so payslips dirtied during the run stay dirty
+        with session_scope(args.org) as session:
+            generations = reserve_payslips(session, args.org, year, month)
+        payslips = _timed(timings, "compute", run_payroll_parallel,
+                          args.org, [(year, month)], workers=args.workers, db_path=db_path)
+        payslips = payslips.drop(columns=["year", "month"])
+        if not payslips.empty:
+            with session_scope(args.org) as session:
+                _timed(timings, "store", store_payslips, session, payslips, year, month,
+                       generations=generations)
+    else:
+        # The ledger recomputes and stores whatever is missing or dirty, a chunk at a time
+        payslips = _timed(timings, "compute", lambda: pd.concat(
+            list(iter_payslip_chunks(args.org, year, month)) or [pd.DataFrame()], ignore_index=True))
+
+    if payslips.empty:
+        print(f"No employees found for {args.org!r}", file=sys.stderr)
+        return 1
+
+    if args.csv:
+        _timed(timings, "csv", _write, args.csv, iter_register_csv([payslips]))
+    if args.zip:
+        period_name = pd.Timestamp(year=year, month=month, day=1).strftime("%B %Y")
+        _timed(timings, "zip", _write, args.zip, iter_payslip_zip([payslips], period_name,
+                                                               organization_rules(args.org)))
+
+    print(f"{args.org} {period}: {len(payslips)} payslips")
+    print(f"  gross {payslips['gross_salary'].sum():,.2f}  tax {payslips['tax'].sum():,.2f}  "
+          f"net {payslips['net_salary'].sum():,.2f}")
+    if int(payslips['penalty_applied'].sum()):
+        print(f"  attendance penalty applied to {int(payslips['penalty_applied'].sum())} employee(s)")
+    for path in (args.csv, args.zip):
+        if path:
+            print(f"  wrote {path} ({os.path.getsize(path)} bytes)")
+    print("  " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+          + f", total {sum(timings.values()):.2f}s")
+    return 0
+
+def check_attendance_command(args):
+    from connection import database_path, session_scope
+    from setup import setup_database
+    from attendance_bitmap import find_bitmap_drift, rebuild_bitmaps
+    from payslip_ledger import mark_months_dirty
+
+    setup_database()
+    if args.org and database_path(args.org, create=False) is None:
+        print(f"No database found for {args.org!r}", file=sys.stderr)
+        return 1
+    with session_scope(args.org) as session:
+        conn = session.connection()
+        drift = find_bitmap_drift(conn)
+        for employee_id, year, month, bitmap_mask, daily_mask in drift:
+            print(f"  employee {employee_id} {year}-{month:02d}: bitmap {bitmap_mask:#010x}, daily rows {daily_mask:#010x}")
+        if not drift:
+            print("Attendance bitmaps match the daily rows.")
+            return 0
+        if not args.repair:
+            print(f"{len(drift)} month(s) disagree with the daily rows; run again with --repair to rebuild them.")
+            return 1
+        rebuild_bitmaps(conn)
+        mark_months_dirty(session, [(employee_id, year, month) for employee_id, year, month, _, _ in drift])
+        session.commit()
+    print(f"Rebuilt the bitmaps and marked the payslips of {len(drift)} month(s) for recompute. "
+          f"Restart running app processes so their cached attendance is reloaded.")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m payroll_streamlit", description="Payroll batch jobs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="compute, store and export one month's payslips")
+    run.add_argument("--org", required=True, help="organization name")
+    run.add_argument("--month", required=True, type=parse_month, help="payroll month, YYYY-MM")
+    run.add_argument("--workers", type=int, default=1, help="compute in this many processes")
+    run.add_argument("--csv", help="write the payslip register to this CSV file")
+    run.add_argument("--zip", help="write a ZIP of text payslips to this file")
+    run.add_argument("--db", help="SQLite database (defaults to PAYROLL_DB or the app's database)")
+
+    check = commands.add_parser("check-attendance",
+                                help="compare the attendance bitmaps with the daily attendance rows")
+    check.add_argument("--org", help="check the database of this organization (when sharded)")
+    check.add_argument("--repair", action="store_true", help="rebuild bitmaps that disagree with the daily rows")
+    check.add_argument("--db", help="SQLite database (defaults to PAYROLL_DB or the app's database)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["PAYROLL_DB"] = os.path.abspath(args.db)
+    if args.command == "check-attendance":
+        return check_attendance_command(args)
+
+    if args.command == "run":
+        if args.workers < 1:
+            parser.error("--workers must be at least 1")
+        return run_command(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
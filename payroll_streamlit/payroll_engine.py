@@ -0,0 +1,96 @@
+import argparse
+import calendar
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from attendance_bitmap import load_month_masks, popcount
+from db_setup import Employee
+from salary_rules import DEFAULT_COMPILED, load_rules
+from workday_calendar import build_month, month_calendar
+
+PAYSLIP_COLUMNS = [
+    'employee_id', 'name', 'department', 'basic_salary',
+    'days_present', 'total_workdays', 'attendance_percentage',
+    'basic_pay', 'hra', 'da', 'bonus', 'gross_salary',
+    'penalty_applied', 'penalty_amount', 'deductions', 'tax', 'net_salary',
+]
+
+def month_bounds(year, month):
+    """Return the first and last date of a month."""
+    start_date = date(year, month, 1)
+    end_date = date(year, month, calendar.monthrange(year, month)[1])
+    return start_date, end_date
+
+def parse_month(value):
+    """Parse a YYYY-MM command-line argument into (year, month)."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        date(year, month, 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM, got {value!r}")
+    return year, month
+
+def load_employees(session, organization, employee_ids=None):
+    """Fetch the employees of an organization as a DataFrame in a single query."""
+    query = session.query(
+        Employee.id.label('employee_id'),
+        Employee.name,
+        Employee.department,
+        Employee.basic_salary,
+    ).filter(Employee.organization == organization)
+    if employee_ids is not None:
+        query = query.filter(Employee.id.in_(list(employee_ids)))
+    rows = query.order_by(Employee.id).all()
+    return pd.DataFrame(rows, columns=['employee_id', 'name', 'department', 'basic_salary'])
+
+def load_days_present(session, organization, year, month, employee_ids=None, workdays=None):
+    """Count present workdays per employee for a month from the attendance bitmaps."""
+    workdays = workdays or month_calendar(session, organization, year, month)
+    masks = load_month_masks(session, organization, year, month, employee_ids)
+    days_present = popcount(masks.to_numpy() & workdays.workday_mask)
+    return pd.Series(days_present, index=masks.index, dtype='int64', name='days_present')
+
+def compute_payslips(employees, days_present, year, month, today=None, rules=DEFAULT_COMPILED, workdays=None):
+    """Compute every payslip component for all employees at once.
+
+    `employees` is a DataFrame with `employee_id` and `basic_salary` columns and
+    `days_present` a Series indexed by employee id. Allowances, bonus, penalty
+    and tax come from the compiled salary `rules`, applied column-wise. `workdays`
+    is the organization's MonthCalendar (no holidays when omitted).
+    """
+    today = today or date.today()
+    total_workdays = (workdays or build_month(year, month)).total_workdays
+    is_past_month = (year < today.year) or (year == today.year and month < today.month)
+
+    df = employees.copy()
+    df['days_present'] = df['employee_id'].map(days_present).fillna(0).astype('int64')
+    df['total_workdays'] = total_workdays
+
+    days = df['days_present'].to_numpy(dtype='float64')
+    basic_salary = df['basic_salary'].to_numpy(dtype='float64')
+
+    attendance_ratio = days / total_workdays if total_workdays > 0 else np.zeros_like(days)
+    attendance_percentage = attendance_ratio * 100
+    basic_pay = basic_salary * attendance_ratio
+    components = rules.evaluate(basic_salary, basic_pay, attendance_percentage, is_past_month)
+
+    df['attendance_percentage'] = attendance_percentage
+    df['basic_pay'] = basic_pay
+    for name in ('hra', 'da', 'bonus', 'gross_salary', 'penalty_applied', 'penalty_amount'):
+        df[name] = components[name]
+    df['deductions'] = 0.0
+    df['tax'] = components['tax']
+    df['net_salary'] = components['gross_salary'] - components['tax']
+    return df.reindex(columns=[c for c in PAYSLIP_COLUMNS if c in df.columns])
+
+def run_payroll(session, organization, year, month, employee_ids=None, today=None, rules=None):
+    """Compute the month's payslips for an organization (or a subset of its employees).
+
+    Uses the organization's salary rules unless compiled `rules` are given.
+    """
+    rules = rules or load_rules(session, organization)
+    workdays = month_calendar(session, organization, year, month)
+    employees = load_employees(session, organization, employee_ids)
+    days_present = load_days_present(session, organization, year, month, employee_ids, workdays=workdays)
+    return compute_payslips(employees, days_present, year, month, today=today, rules=rules, workdays=workdays)
@@ -0,0 +1,87 @@
+import os
+from functools import lru_cache
+
+import plotly.graph_objects as go
+
+CHART_CACHE_SIZE = int(os.environ.get("PAYROLL_CHART_CACHE_SIZE", "256"))
+# "express" draws the original Plotly Express charts; "light" builds a single
+# graph_objects trace per chart directly, with no DataFrame and a smaller payload
+CHART_MODE = os.environ.get("PAYROLL_CHART_MODE", "express")
+
+COMPONENTS = ('Basic Pay', 'HRA', 'DA', 'Bonus', 'Deductions', 'Tax')
+COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b')
+BAR_TITLE = 'Salary Breakdown'
+PIE_TITLE = 'Salary Components Distribution'
+
+def _express_charts(amounts):
+    import pandas as pd
+    import plotly.express as px
+
+    df_salary = pd.DataFrame({'Component': list(COMPONENTS), 'Amount': list(amounts)})
+    fig_bar = px.bar(
+        df_salary,
+        y='Component',
+        x='Amount',
+        orientation='h',
+        text='Amount',
+        color='Component',
+        color_discrete_sequence=list(COLORS),
+        title=BAR_TITLE,
+        labels={'Amount': 'Amount (₹)', 'Component': 'Salary Components'}
+    )
+    fig_bar.update_traces(texttemplate='₹%{x:.2f}', textposition='outside')
+    fig_bar.update_layout(yaxis={'categoryorder': 'total ascending'}, showlegend=False, margin=dict(l=120))
+
+    fig_pie = px.pie(
+        df_salary,
+        values='Amount',
+        names='Component',
+        title=PIE_TITLE,
+        color='Component',
+        color_discrete_sequence=list(COLORS),
+        hole=0.3
+    )
+    fig_pie.update_traces(textposition='inside', textinfo='percent+label')
+    return fig_bar, fig_pie
+
+def _light_charts(amounts):
+    fig_bar = go.Figure(
+        go.Bar(
+            y=COMPONENTS,
+            x=amounts,
+            orientation='h',
+            marker_color=COLORS,
+            texttemplate='₹%{x:.2f}',
+            textposition='outside',
+        ),
+        layout=dict(
+            title=BAR_TITLE,
+            xaxis_title='Amount (₹)',
+            yaxis=dict(title='Salary Components', categoryorder='total ascending'),
+            showlegend=False,
+            margin=dict(l=120),
+        ),
+    )
+    fig_pie = go.Figure(
+        go.Pie(
+            labels=COMPONENTS,
+            values=amounts,
+            marker_colors=COLORS,
+            hole=0.3,
+            sort=True,
+            textposition='inside',
+            textinfo='percent+label',
+        ),
+        layout=dict(title=PIE_TITLE),
+    )
+    return fig_bar, fig_pie
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def salary_charts(amounts, mode=CHART_MODE):
+    """(bar, pie) figures for a payslip's component amounts, in COMPONENTS order.
+
+    Built once per distinct amounts and mode; callers must not modify them.
+    """
+    if mode == "light":
+        return _light_charts(amounts)
+    return _express_charts(amounts)
@@ -0,0 +1,180 @@
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import and_, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from db_setup import Employee, Payslip
+from payroll_engine import PAYSLIP_COLUMNS, run_payroll
+from salary_rules import load_rules
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+CHUNK_SIZE = 500
+
+STORED_COLUMNS = [c for c in PAYSLIP_COLUMNS if c not in ('employee_id', 'name', 'department')]
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+# Every mark-dirty bumps the generation, so a recompute that started before it can't clear the flag
+_MARK_DIRTY = {Payslip.is_dirty: True, Payslip.dirty_generation: Payslip.dirty_generation + 1}
+
+def mark_months_dirty(session, keys):
+    """Flag stored payslips for the given (employee_id, year, month) keys for recompute."""
+    for chunk in _chunks(set(keys)):
+        session.query(Payslip).filter(
+            tuple_(Payslip.employee_id, Payslip.year, Payslip.month).in_(chunk)
+        ).update(_MARK_DIRTY, synchronize_session=False)
+
+def mark_employee_dirty(session, employee_id):
+    """Flag every stored payslip of an employee, e.g. after a salary change."""
+    mark_employees_dirty(session, [employee_id])
+
+def mark_employees_dirty(session, employee_ids):
+    """Flag every stored payslip of several employees with one UPDATE per chunk."""
+    for chunk in _chunks(set(employee_ids)):
+        session.query(Payslip).filter(Payslip.employee_id.in_(chunk)).update(
+            _MARK_DIRTY, synchronize_session=False
+        )
+
+def mark_organization_dirty(session, organization, year=None, month=None):
+    """Flag the stored payslips of an organization, e.g. after its salary rules
+    change, or only those of one month, e.g. after a holiday is declared."""
+    employee_ids = session.query(Employee.id).filter(Employee.organization == organization)
+    query = session.query(Payslip).filter(Payslip.employee_id.in_(employee_ids.scalar_subquery()))
+    if year is not None:
+        query = query.filter(Payslip.year == year, Payslip.month == month)
+    query.update(_MARK_DIRTY, synchronize_session=False)
+
+def delete_employee_payslips(session, employee_id):
+    session.query(Payslip).filter(Payslip.employee_id == employee_id).delete(synchronize_session=False)
+
+def _load_stored(session, organization, year, month, employee_ids=None):
+    # Outer join so employees without a stored payslip come back with empty components
+    query = session.query(
+        Employee.id.label('employee_id'),
+        Employee.name,
+        Employee.department,
+        *[getattr(Payslip, c) for c in STORED_COLUMNS],
+        Payslip.is_past_month,
+        Payslip.is_dirty,
+        Payslip.dirty_generation,
+    ).outerjoin(Payslip, and_(
+        Payslip.employee_id == Employee.id,
+        Payslip.year == year,
+        Payslip.month == month,
+    )).filter(Employee.organization == organization)
+    if employee_ids is not None:
+        query = query.filter(Employee.id.in_(list(employee_ids)))
+    columns = ['employee_id', 'name', 'department', *STORED_COLUMNS, 'is_past_month', 'is_dirty', 'dirty_generation']
+    return pd.DataFrame(query.order_by(Employee.id).all(), columns=columns)
+
+def _insert_placeholders(session, employee_ids, year, month, is_past_month):
+    """Insert dirty zero rows for employees without a stored payslip for the month,
+    so writes made while their first payslip is computed have a row to mark."""
+    computed_at = datetime.now()
+    rows = [
+        dict(employee_id=employee_id, year=year, month=month, is_past_month=is_past_month,
+             is_dirty=True, dirty_generation=0, computed_at=computed_at, **dict.fromkeys(STORED_COLUMNS, 0))
+        for employee_id in employee_ids
+    ]
+    stmt = sqlite_insert(Payslip).on_conflict_do_nothing(
+        index_elements=[Payslip.employee_id, Payslip.year, Payslip.month])
+    for chunk in _chunks(rows):
+        session.execute(stmt, chunk)
+
+def reserve_payslips(session, organization, year, month, today=None):
+    """Prepare an organization's month for a recompute stored with store_payslips.
+
+    Commits dirty placeholders for employees without a stored payslip and returns
+    {employee_id: dirty_generation} of every employee; call it before computing.
+    """
+    today = today or date.today()
+    is_past_month = (year < today.year) or (year == today.year and month < today.month)
+    employee_ids = [row[0] for row in session.query(Employee.id).filter(Employee.organization == organization)]
+    _insert_placeholders(session, employee_ids, year, month, is_past_month)
+    session.commit()
+    return dict(session.query(Payslip.employee_id, Payslip.dirty_generation).join(
+        Employee, Employee.id == Payslip.employee_id
+    ).filter(
+        Employee.organization == organization,
+        Payslip.year == year,
+        Payslip.month == month,
+    ).all())
+
+def _store(session, payslips, year, month, is_past_month, generations):
+    """Upsert computed payslips as clean. A stored row is only replaced while its
+    dirty_generation still equals the one in `generations` (read before computing),
+    so a write committed meanwhile keeps its dirty flag."""
+    if payslips.empty:
+        return
+    computed_at = datetime.now()
+    rows = [
+        dict(employee_id=r['employee_id'], year=year, month=month, is_past_month=is_past_month,
+             is_dirty=False, dirty_generation=generations.get(r['employee_id'], 0), computed_at=computed_at,
+             **{c: r[c] for c in STORED_COLUMNS})
+        for r in payslips.to_dict('records')
+    ]
+    stmt = sqlite_insert(Payslip)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Payslip.employee_id, Payslip.year, Payslip.month],
+        set_={c: stmt.excluded[c] for c in [*STORED_COLUMNS, 'is_past_month', 'is_dirty', 'computed_at']},
+        where=Payslip.dirty_generation == stmt.excluded.dirty_generation,
+    )
+    for chunk in _chunks(rows):
+        session.execute(stmt, chunk)
+
+def store_payslips(session, payslips, year, month, today=None, generations=None):
+    """Write payslips computed elsewhere (e.g. a parallel run) to the ledger and commit.
+
+    Pass the generations returned by reserve_payslips before computing them;
+    without them, rows marked dirty while they were computed are overwritten as clean.
+    """
+    today = today or date.today()
+    is_past_month = (year < today.year) or (year == today.year and month < today.month)
+    if generations is None:
+        generations = {
+            employee_id: generation for employee_id, generation in session.query(
+                Payslip.employee_id, Payslip.dirty_generation).filter(
+                Payslip.employee_id.in_(payslips['employee_id'].tolist()),
+                Payslip.year == year, Payslip.month == month,
+            )
+        }
+    _store(session, payslips, year, month, is_past_month, generations)
+    session.commit()
+
+def get_payslips(session, organization, year, month, employee_ids=None, today=None):
+    """Return the month's payslips, recomputing only missing or dirty entries.
+
+    A stored payslip is also stale when it was computed while the month was still
+    running and the month has since ended, because the attendance penalty depends
+    on it. Recomputed entries are written back before returning.
+    """
+    today = today or date.today()
+    is_past_month = (year < today.year) or (year == today.year and month < today.month)
+
+    stored = _load_stored(session, organization, year, month, employee_ids)
+    is_fresh = stored['is_dirty'].eq(False) & stored['is_past_month'].eq(is_past_month)
+    fresh = stored[is_fresh]
+    stale = stored[~is_fresh]
+    stale_ids = stale['employee_id'].tolist()
+
+    if stale_ids:
+        # Employees without a stored payslip get a dirty placeholder at generation 0
+        missing = stale.loc[stale['dirty_generation'].isna(), 'employee_id'].tolist()
+        if missing:
+            _insert_placeholders(session, missing, year, month, is_past_month)
+            session.commit()
+        generations = dict(zip(stale['employee_id'], stale['dirty_generation'].fillna(0).astype('int64')))
+        rules = load_rules(session, organization)
+        recomputed = pd.concat([
+            run_payroll(session, organization, year, month, employee_ids=chunk, today=today, rules=rules)
+            for chunk in _chunks(stale_ids)
+        ])
+        _store(session, recomputed, year, month, is_past_month, generations)
+        session.commit()
+        fresh = pd.concat([fresh, recomputed]) if not fresh.empty else recomputed
+
+    return fresh.reindex(columns=PAYSLIP_COLUMNS).sort_values('employee_id').reset_index(drop=True)
@@ -0,0 +1,207 @@
+"""Per-organization salary rules.
+
+A rule set is a JSON object; missing keys fall back to DEFAULT_RULES, which
+are the rates the payslip page has always used:
+
+    {
+      "hra_rate": 0.20,                       # share of pro-rata basic pay
+      "da_rate": 0.10,
+      "bonus": {"min_attendance_percentage": 95, "rate_of_basic_salary": 0.05},
+      "penalty": {"below_attendance_percentage": 75, "rate_of_gross": 0.30,
+                  "completed_months_only": true},
+      "tax_slabs": [{"up_to": 15000, "rate": 0.0},
+                    {"up_to": 30000, "rate": 0.05},
+                    {"up_to": null, "rate": 0.10}]   # flat rate on the whole gross
+    }
+
+Rule sets are validated and compiled once into a function over NumPy arrays,
+and the compiled form is cached by (organization, version).
+"""
+import json
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from db_setup import SalaryRuleSet
+
+DEFAULT_RULES = {
+    "hra_rate": 0.20,
+    "da_rate": 0.10,
+    "bonus": {"min_attendance_percentage": 95, "rate_of_basic_salary": 0.05},
+    "penalty": {"below_attendance_percentage": 75, "rate_of_gross": 0.30, "completed_months_only": True},
+    "tax_slabs": [
+        {"up_to": 15000, "rate": 0.0},
+        {"up_to": 30000, "rate": 0.05},
+        {"up_to": None, "rate": 0.10},
+    ],
+}
+MAX_COMPILED = 256
+
+CompiledRules = namedtuple("CompiledRules", ["version", "config", "evaluate"])
+
+class RuleError(ValueError):
+    pass
+
+def _number(value, where, minimum=0.0, maximum=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RuleError(f"{where} must be a number")
+    if value < minimum or (maximum is not None and value > maximum):
+        bound = f"between {minimum} and {maximum}" if maximum is not None else f"at least {minimum}"
+        raise RuleError(f"{where} must be {bound}")
+    return float(value)
+
+def _section(config, name):
+    section = dict(DEFAULT_RULES[name])
+    given = config.get(name, {})
+    if not isinstance(given, dict):
+        raise RuleError(f"'{name}' must be an object")
+    unknown = set(given) - set(section)
+    if unknown:
+        raise RuleError(f"unknown keys in '{name}': {', '.join(sorted(unknown))}")
+    section.update(given)
+    return section
+
+def parse_rules(config):
+    """Validate a rule set (dict or JSON text) and return it complete and normalized."""
+    if isinstance(config, str):
+        try:
+            config = json.loads(config)
+        except json.JSONDecodeError as e:
+            raise RuleError(f"invalid JSON: {e}")
+    if not isinstance(config, dict):
+        raise RuleError("rules must be a JSON object")
+    unknown = set(config) - set(DEFAULT_RULES)
+    if unknown:
+        raise RuleError(f"unknown keys: {', '.join(sorted(unknown))}")
+
+    bonus = _section(config, "bonus")
+    penalty = _section(config, "penalty")
+    if not isinstance(penalty["completed_months_only"], bool):
+        raise RuleError("penalty.completed_months_only must be true or false")
+
+    slabs = config.get("tax_slabs", DEFAULT_RULES["tax_slabs"])
+    if not isinstance(slabs, list) or not slabs:
+        raise RuleError("'tax_slabs' must be a non-empty list")
+    parsed_slabs, previous = [], None
+    for i, slab in enumerate(slabs):
+        if not isinstance(slab, dict) or set(slab) != {"up_to", "rate"}:
+            raise RuleError(f"tax_slabs[{i}] must have exactly 'up_to' and 'rate'")
+        up_to = slab["up_to"]
+        if i == len(slabs) - 1:
+            if up_to is not None:
+                raise RuleError("the last tax slab must have \"up_to\": null")
+        else:
+            up_to = _number(up_to, f"tax_slabs[{i}].up_to")
+            if previous is not None and up_to <= previous:
+                raise RuleError("tax slab limits must increase")
+            previous = up_to
+        parsed_slabs.append({"up_to": up_to, "rate": _number(slab["rate"], f"tax_slabs[{i}].rate", maximum=1.0)})
+
+    return {
+        "hra_rate": _number(config.get("hra_rate", DEFAULT_RULES["hra_rate"]), "hra_rate"),
+        "da_rate": _number(config.get("da_rate", DEFAULT_RULES["da_rate"]), "da_rate"),
+        "bonus": {
+            "min_attendance_percentage": _number(bonus["min_attendance_percentage"],
+                                                 "bonus.min_attendance_percentage", maximum=100.0),
+            "rate_of_basic_salary": _number(bonus["rate_of_basic_salary"], "bonus.rate_of_basic_salary"),
+        },
+        "penalty": {
+            "below_attendance_percentage": _number(penalty["below_attendance_percentage"],
+                                                   "penalty.below_attendance_percentage", maximum=100.0),
+            "rate_of_gross": _number(penalty["rate_of_gross"], "penalty.rate_of_gross", maximum=1.0),
+            "completed_months_only": penalty["completed_months_only"],
+        },
+        "tax_slabs": parsed_slabs,
+    }
+
+def compile_rules(config, version=0):
+    """Compile a rule set into CompiledRules whose `evaluate` works on whole arrays.
+
+    evaluate(basic_salary, basic_pay, attendance_percentage, is_past_month) returns
+    a dict of arrays: hra, da, bonus, gross_salary (after penalty),
+    penalty_applied, penalty_amount and tax.
+    """
+    rules = parse_rules(config)
+    hra_rate, da_rate = rules["hra_rate"], rules["da_rate"]
+    bonus_threshold = rules["bonus"]["min_attendance_percentage"]
+    bonus_rate = rules["bonus"]["rate_of_basic_salary"]
+    penalty_threshold = rules["penalty"]["below_attendance_percentage"]
+    penalty_rate = rules["penalty"]["rate_of_gross"]
+    completed_months_only = rules["penalty"]["completed_months_only"]
+    slab_limits = [slab["up_to"] for slab in rules["tax_slabs"][:-1]]
+    slab_rates = [slab["rate"] for slab in rules["tax_slabs"]]
+
+    def evaluate(basic_salary, basic_pay, attendance_percentage, is_past_month):
+        hra = hra_rate * basic_pay
+        da = da_rate * basic_pay
+        bonus = np.where(attendance_percentage >= bonus_threshold, bonus_rate * basic_salary, 0.0)
+        gross_salary = basic_pay + hra + da + bonus
+
+        penalty_due = (is_past_month or not completed_months_only)
+        penalty_applied = penalty_due & (attendance_percentage < penalty_threshold)
+        penalty_amount = np.where(penalty_applied, penalty_rate * gross_salary, 0.0)
+        gross_salary = gross_salary - penalty_amount
+
+        # First matching slab wins; its rate applies to the whole gross
+        if slab_limits:
+            tax = np.select(
+                [gross_salary <= limit for limit in slab_limits],
+                [rate * gross_salary for rate in slab_rates[:-1]],
+                slab_rates[-1] * gross_salary,
+            )
+        else:
+            tax = slab_rates[-1] * gross_salary
+        return {
+            'hra': hra, 'da': da, 'bonus': bonus, 'gross_salary': gross_salary,
+            'penalty_applied': penalty_applied, 'penalty_amount': penalty_amount, 'tax': tax,
+        }
+
+    return CompiledRules(version, rules, evaluate)
+
+DEFAULT_COMPILED = compile_rules(DEFAULT_RULES)
+
+_lock = threading.Lock()
+_compiled = {}  # (organization, version) -> CompiledRules
+
+def load_rules(session, organization):
+    """The organization's compiled rules; one small query when already compiled."""
+    version = session.query(SalaryRuleSet.version).filter(SalaryRuleSet.organization == organization).scalar()
+    if version is None:
+        return DEFAULT_COMPILED
+    compiled = _compiled.get((organization, version))
+    if compiled is None:
+        # Read the version again with the rules in case they were saved meanwhile
+        version, text = session.query(SalaryRuleSet.version, SalaryRuleSet.rules).filter(
+            SalaryRuleSet.organization == organization).one()
+        compiled = compile_rules(json.loads(text), version)
+        with _lock:
+            if len(_compiled) >= MAX_COMPILED:
+                _compiled.clear()
+            _compiled[(organization, version)] = compiled
+    return compiled
+
+def save_rules(session, organization, config):
+    """Validate and store an organization's rules under a new version; returns it.
+
+    Nothing is committed. Stored payslips computed with the old rules need to be
+    marked dirty by the caller (payslip_ledger.mark_organization_dirty).
+    """
+    rules = parse_rules(config)
+    row = session.query(SalaryRuleSet).filter(SalaryRuleSet.organization == organization).first()
+    if row is None:
+        row = SalaryRuleSet(organization=organization, version=0)
+        session.add(row)
+    row.version += 1
+    row.rules = json.dumps(rules)
+    row.updated_at = datetime.now()
+    session.flush()
+    return row.version
+
+def format_rules(config):
+    return json.dumps(config, indent=2)
+
+def percent(rate):
+    """0.2 -> '20%'."""
+    return f"{rate * 100:g}%"
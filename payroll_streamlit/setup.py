@@ -1,10 +1,122 @@
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
 from connection import engine
 from db_setup import Base
 
-def setup_database():
-    """Create all tables in the database."""
-    Base.metadata.create_all(engine)
+def _add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless create_all already made the table with it."""
+    columns = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _add_lookup_indexes(conn):
+    # Keep only the latest row of any duplicated (employee, day) before enforcing uniqueness
+    conn.exec_driver_sql(
+        "DELETE FROM attendances WHERE id NOT IN "
+        "(SELECT MAX(id) FROM attendances GROUP BY employee_id, date)"
+    )
+    conn.exec_driver_sql(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_attendances_employee_date ON attendances (employee_id, date)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_employees_organization_name ON employees (organization, name)"
+    )
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_users_username_organization ON users (username, organization)"
+    )
+
+def _add_contact_outbox(conn):
+    # Messages stored before the outbox existed were already emailed synchronously
+    _add_column(conn, "contact_messages", "status", "VARCHAR NOT NULL DEFAULT 'sent'")
+    _add_column(conn, "contact_messages", "attempts", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "contact_messages", "next_attempt_at", "DATETIME")
+    _add_column(conn, "contact_messages", "last_error", "VARCHAR")
+    _add_column(conn, "contact_messages", "sent_at", "DATETIME")
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_contact_messages_status_next_attempt "
+        "ON contact_messages (status, next_attempt_at)"
+    )
+
+def create_employee_search(conn):
+    """Create the trigram FTS5 index over employee name and department, kept in
+    sync with the employees table by triggers. Returns False when this SQLite
+    build lacks FTS5/trigram support; search then falls back to LIKE."""
+    try:
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5("
+            "name, department, content='employees', content_rowid='id', tokenize='trigram')"
+        )
+    except OperationalError:
+        return False
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN "
+        "INSERT INTO employees_fts(rowid, name, department) VALUES (new.id, new.name, new.department); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN "
+        "INSERT INTO employees_fts(employees_fts, rowid, name, department) "
+        "VALUES ('delete', old.id, old.name, old.department); END"
+    )
+    conn.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE OF name, department ON employees BEGIN "
+        "INSERT INTO employees_fts(employees_fts, rowid, name, department) "
+        "VALUES ('delete', old.id, old.name, old.department); "
+        "INSERT INTO employees_fts(rowid, name, department) VALUES (new.id, new.name, new.department); END"
+    )
+    return True
+
+def _add_employee_search(conn):
+    if create_employee_search(conn):
+        conn.exec_driver_sql("INSERT INTO employees_fts(employees_fts) VALUES ('rebuild')")
+
+def _add_attendance_bitmaps(conn):
+    # Imported here so the login screen doesn't pay for numpy and pandas
+    from attendance_bitmap import rebuild_bitmaps
+    rebuild_bitmaps(conn)
+
+def _add_payslip_dirty_generation(conn):
+    _add_column(conn, "payslips", "dirty_generation", "INTEGER NOT NULL DEFAULT 0")
+
+# Ordered (schema version, upgrade step) pairs. create_all runs first, so a step may
+# find the tables it alters already created in their latest form.
+MIGRATIONS = [
+    (1, _add_lookup_indexes),
+    (2, _add_contact_outbox),
+    (3, _add_employee_search),
+    (4, _add_attendance_bitmaps),
+    (5, _add_payslip_dirty_generation),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+def _set_schema_version(conn, version):
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+def migrate(bind=engine):
+    """Upgrade an existing database in place to the latest schema version."""
+    with bind.begin() as conn:
+        version = get_schema_version(conn)
+        for target, step in MIGRATIONS:
+            if version < target:
+                step(conn)
+                _set_schema_version(conn, target)
+                version = target
+    return version
+
+def setup_database(bind=engine):
+    """Create missing tables and bring the schema up to date."""
+    is_new = not inspect(bind).get_table_names()
+    Base.metadata.create_all(bind)
+    if is_new:
+        with bind.begin() as conn:
+            create_employee_search(conn)
+            _set_schema_version(conn, LATEST_VERSION)
+        return LATEST_VERSION
+    return migrate(bind)
 
 if __name__ == "__main__":
-    setup_database()
-    print("Database tables created successfully.")
+    version = setup_database()
+    print(f"Database is ready (schema version {version}).")
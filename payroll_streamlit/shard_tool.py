@@ -0,0 +1,122 @@
+"""Split a shared payroll database into one database per organization.
+
+    python shard_tool.py split --source plus2_payroll.db --shard-dir shards
+    PAYROLL_SHARD_DIR=shards streamlit run main.py
+
+The source is only read. The shard directory gets a catalog.db with the users,
+contact messages and the tenants table (organization -> shard file), and one
+database per organization with its employees, attendance, attendance bitmaps,
+payslips, salary rules and holidays. Employee ids are kept, so everything that
+refers to them stays valid.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect
+
+from connection import make_engine, shard_file_name
+from db_setup import Base
+from setup import LATEST_VERSION, setup_database
+
+CATALOG_TABLES = ["users", "contact_messages"]
+
+# Rows of each tenant table that belong to one organization, in dependency order
+_OWN_EMPLOYEES = "employee_id IN (SELECT id FROM src.employees WHERE organization = :organization)"
+TENANT_TABLES = [
+    ("employees", "organization = :organization"),
+    ("attendances", _OWN_EMPLOYEES),
+    ("attendance_months", _OWN_EMPLOYEES),
+    ("payslips", _OWN_EMPLOYEES),
+    ("salary_rule_sets", "organization = :organization"),
+    ("holidays", "organization = :organization"),
+]
+
+def _copy(conn, table, source_tables, where="1", params=None):
+    """INSERT the matching rows of src.<table> into <table>; returns the row count."""
+    if table not in source_tables:
+        return 0
+    columns = ", ".join(column.name for column in Base.metadata.tables[table].columns)
+    result = conn.exec_driver_sql(
+        f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM src.{table} WHERE {where}",
+        params or {},
+    )
+    return result.rowcount
+
+def _organizations(conn, source_tables):
+    selects = [f"SELECT organization FROM src.{table}"
+               for table in ("employees", "users", "salary_rule_sets", "holidays") if table in source_tables]
+    return [row[0] for row in conn.exec_driver_sql(" UNION ".join(selects) + " ORDER BY 1")]
+
+def split_database(source, shard_dir, catalog=None):
+    """Copy `source` into a catalog plus one shard per organization.
+
+    Returns a list of (organization, shard file name, employees copied).
+    """
+    catalog = catalog or os.path.join(shard_dir, "catalog.db")
+    if not os.path.exists(source):
+        raise SystemExit(f"{source} does not exist")
+    if os.path.exists(catalog):
+        raise SystemExit(f"{catalog} already exists; split into an empty shard directory")
+
+    source_engine = make_engine(source, readonly=True, pool_size=1, max_overflow=0)
+    with source_engine.connect() as conn:
+        version = conn.exec_driver_sql("PRAGMA user_version").scalar()
+        source_tables = set(inspect(conn).get_table_names())
+    source_engine.dispose()
+    if version < LATEST_VERSION:
+        raise SystemExit(f"{source} is at schema version {version}; open it with the app "
+                         f"(or run setup.py against it) to upgrade it to {LATEST_VERSION} first")
+
+    os.makedirs(shard_dir, exist_ok=True)
+    catalog_engine = make_engine(catalog, pool_size=1, max_overflow=0)
+    setup_database(catalog_engine)
+    with catalog_engine.begin() as conn:
+        conn.exec_driver_sql("ATTACH DATABASE ? AS src", (source,))
+        for table in CATALOG_TABLES:
+            _copy(conn, table, source_tables)
+        organizations = _organizations(conn, source_tables)
+        shards = {organization: shard_file_name(organization) for organization in organizations}
+        created_at = datetime.now().isoformat(" ")
+        conn.exec_driver_sql(
+            "INSERT INTO tenants (organization, shard, created_at) VALUES (?, ?, ?)",
+            [(organization, shard, created_at) for organization, shard in shards.items()],
+        )
+    catalog_engine.dispose()
+
+    summary = []
+    for organization, shard in shards.items():
+        path = os.path.join(shard_dir, shard)
+        if os.path.exists(path):
+            raise SystemExit(f"{path} already exists")
+        shard_engine = make_engine(path, pool_size=1, max_overflow=0)
+        setup_database(shard_engine)
+        with shard_engine.begin() as conn:
+            conn.exec_driver_sql("ATTACH DATABASE ? AS src", (source,))
+            copied = {table: _copy(conn, table, source_tables, where, {"organization": organization})
+                      for table, where in TENANT_TABLES}
+        shard_engine.dispose()
+        summary.append((organization, shard, copied["employees"]))
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-organization database tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    split = commands.add_parser("split", help="split a shared database into per-organization shards")
+    split.add_argument("--source", required=True, help="the shared SQLite database to read")
+    split.add_argument("--shard-dir", required=True, help="empty directory for the catalog and shards")
+    split.add_argument("--catalog", help="catalog database path (default: <shard-dir>/catalog.db)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    summary = split_database(args.source, args.shard_dir, args.catalog)
+    for organization, shard, employees in summary:
+        print(f"  {organization!r}: {employees} employee(s) -> {shard}")
+    print(f"Split {len(summary)} organization(s) in {time.perf_counter() - started:.2f}s. "
+          f"Run the app with PAYROLL_SHARD_DIR={args.shard_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# connection.py opens its engine on import, so point it at a scratch database first
+os.environ["PAYROLL_DB"] = os.path.join(tempfile.mkdtemp(prefix="payroll_tests_"), "payroll.db")
+os.environ.pop("PAYROLL_SHARD_DIR", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from setup import setup_database
+    setup_database()
+    return os.environ["PAYROLL_DB"]
@@ -0,0 +1,65 @@
+"""A minimal in-process SMTP responder for the outbox tests.
+
+It can be made slow, can reject the first few messages with a temporary error,
+and records every delivered message and every connection.
+"""
+import socketserver
+import threading
+import time
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, delay=0.0, reject_first=0):
+        super().__init__(("127.0.0.1", 0), StandInSMTPHandler)
+        self.delay = delay
+        self.reject_remaining = reject_first
+        self.connections = 0
+        self.delivered = []
+        self.lock = threading.Lock()
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline().decode(errors="replace").strip()
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self.reply("250 stand-in")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data_line)
+                time.sleep(server.delay)
+                with server.lock:
+                    reject = server.reject_remaining > 0
+                    if reject:
+                        server.reject_remaining -= 1
+                    else:
+                        server.delivered.append(b"".join(lines))
+                self.reply("451 Try again later" if reject else "250 Queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+def start_server(**kwargs):
+    server = StandInSMTPServer(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
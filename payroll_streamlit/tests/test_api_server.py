@@ -0,0 +1,54 @@
+import asyncio
+import json
+import os
+from http import HTTPStatus
+
+import pytest
+
+import api_server
+from api_server import ApiError, PayrollApi
+from connection import session_scope
+from db_setup import Employee
+
+ORGANIZATION = "Api Org"
+TOKEN = "secret"
+AUTH = {"authorization": f"Bearer {TOKEN}"}
+
+@pytest.fixture(scope="module")
+def api():
+    with session_scope() as session:
+        session.add(Employee(name="Asha", department="QA", basic_salary=20000, organization=ORGANIZATION))
+        session.commit()
+    api = PayrollApi(os.environ["PAYROLL_DB"], pool_size=2, token=TOKEN)
+    yield api
+    api.close()
+    with session_scope() as session:
+        session.query(Employee).filter(Employee.organization == ORGANIZATION).delete()
+        session.commit()
+
+def get(api, target, headers=AUTH):
+    return asyncio.run(api.respond("GET", target, headers))
+
+@pytest.mark.parametrize("path", ["employees", "attendance?month=2025-03", "payslips?month=2025-03"])
+def test_known_organization(api, path):
+    status, _, body = get(api, f"/orgs/Api%20Org/{path}")
+    assert status == HTTPStatus.OK
+    assert [item.get("name") for item in json.loads(body)["items"]] == ["Asha"]
+
+@pytest.mark.parametrize("path", ["employees", "attendance?month=2025-03", "payslips?month=2025-03"])
+def test_unknown_organization_is_not_found(api, path):
+    with pytest.raises(ApiError) as error:
+        get(api, f"/orgs/No%20Such%20Org/{path}")
+    assert error.value.status == HTTPStatus.NOT_FOUND
+
+def test_requests_need_the_token(api):
+    for headers in ({}, {"authorization": "Bearer wrong"}):
+        with pytest.raises(ApiError) as error:
+            get(api, "/orgs/Api%20Org/employees", headers)
+        assert error.value.status == HTTPStatus.UNAUTHORIZED
+
+def test_refuses_to_start_without_a_token(monkeypatch):
+    monkeypatch.setattr(api_server, "API_TOKEN", None)
+    with pytest.raises(SystemExit) as exit:
+        api_server.main(["--port", "0"])
+    assert exit.value.code == 2
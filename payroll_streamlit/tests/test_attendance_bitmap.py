@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+
+import pytest
+
+from attendance_bitmap import find_bitmap_drift, month_attendance_map
+from attendance_module import upsert_attendance
+from connection import session_scope
+from db_setup import Attendance, AttendanceMonth, Employee, Payslip
+from payroll_cli import main as cli
+from payslip_ledger import get_payslips
+
+ORGANIZATION = "Bitmap Org"
+
+@pytest.fixture
+def employee_ids():
+    with session_scope() as session:
+        employees = [Employee(name=f"Employee {i}", department="QA", basic_salary=25000, organization=ORGANIZATION)
+                     for i in range(3)]
+        session.add_all(employees)
+        session.commit()
+        ids = [employee.id for employee in employees]
+    yield ids
+    with session_scope() as session:
+        for model in (Payslip, Attendance, AttendanceMonth):
+            session.query(model).filter(model.employee_id.in_(ids)).delete()
+        session.query(Employee).filter(Employee.id.in_(ids)).delete()
+        session.commit()
+
+def drift(employee_ids):
+    with session_scope() as session:
+        return [row for row in find_bitmap_drift(session.connection()) if row[0] in employee_ids]
+
+def daily_present_days(session, employee_id, year, month):
+    first = date(year, month, 1)
+    return {row.date for row in session.query(Attendance).filter(
+        Attendance.employee_id == employee_id, Attendance.is_present.is_(True),
+        Attendance.date >= first, Attendance.date < (first + timedelta(days=31)).replace(day=1))}
+
+def test_app_writes_keep_both_stores_in_step(employee_ids):
+    days = [date(2025, 1, 20) + timedelta(days=i) for i in range(30)]  # spans two months
+    with session_scope() as session:
+        upsert_attendance(session, [{"employee_id": e, "date": d, "is_present": (e + d.day) % 3 != 0}
+                                    for e in employee_ids for d in days])
+        session.commit()
+        # Overwrite some days in both directions
+        upsert_attendance(session, [{"employee_id": e, "date": d, "is_present": d.day % 2 == 0}
+                                    for e in employee_ids for d in days[::4]])
+        session.commit()
+
+    assert drift(employee_ids) == []
+    with session_scope() as session:
+        for employee_id in employee_ids:
+            for year, month in ((2025, 1), (2025, 2)):
+                assert set(month_attendance_map(session, employee_id, year, month)) == \
+                    daily_present_days(session, employee_id, year, month)
+
+def test_check_attendance_finds_and_repairs_drift(employee_ids):
+    first, second, third = employee_ids
+    with session_scope() as session:
+        upsert_attendance(session, [{"employee_id": e, "date": date(2025, 3, day), "is_present": True}
+                                    for e in (first, second) for day in (3, 4, 5)])
+        session.commit()
+        payslips = get_payslips(session, ORGANIZATION, 2025, 3, employee_ids=[first], today=date(2025, 6, 1))
+        assert int(payslips['days_present'].iloc[0]) == 3
+        # A bitmap changed behind the daily rows' back, and one with no daily rows at all
+        session.query(AttendanceMonth).filter_by(employee_id=first, year=2025, month=3).update({"present_mask": 0b11000})
+        session.add(AttendanceMonth(employee_id=third, year=2025, month=3, present_mask=1))
+        session.commit()
+
+    # Days 3-5 are bits 2-4
+    assert drift(employee_ids) == [(first, 2025, 3, 0b11000, 0b11100), (third, 2025, 3, 1, 0)]
+    assert cli(["check-attendance"]) == 1
+
+    assert cli(["check-attendance", "--repair"]) == 0
+    assert drift(employee_ids) == []
+    with session_scope() as session:
+        assert session.query(AttendanceMonth).filter_by(employee_id=third).count() == 0
+        assert session.query(Payslip.is_dirty).filter_by(employee_id=first, year=2025, month=3).scalar()
+        payslips = get_payslips(session, ORGANIZATION, 2025, 3, employee_ids=[first], today=date(2025, 6, 1))
+        assert int(payslips['days_present'].iloc[0]) == 3
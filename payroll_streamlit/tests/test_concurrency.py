@@ -0,0 +1,114 @@
+import threading
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from attendance_module import upsert_attendance
+from connection import engine, session_scope
+from db_setup import Attendance, Employee
+
+ORGANIZATION = "Concurrency Org"
+EMPLOYEES = 50
+READERS = 8
+WRITERS = 4
+DAYS_PER_WRITER = 5
+# Only guards against a hang; nothing is asserted about how long anything takes
+JOIN_TIMEOUT = 60
+
+@pytest.fixture(scope="module")
+def employee_ids():
+    with session_scope() as session:
+        employees = [Employee(name=f"Employee {i}", department="QA", basic_salary=20000, organization=ORGANIZATION)
+                     for i in range(EMPLOYEES)]
+        session.add_all(employees)
+        session.commit()
+        return [employee.id for employee in employees]
+
+@pytest.fixture(autouse=True)
+def no_attendance(employee_ids):
+    with session_scope() as session:
+        session.query(Attendance).filter(Attendance.employee_id.in_(employee_ids)).delete()
+        session.commit()
+
+def run_threads(threads):
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(JOIN_TIMEOUT)
+        assert not thread.is_alive()
+
+def attendance_count(employee_ids):
+    with session_scope() as session:
+        return session.query(Attendance).filter(Attendance.employee_id.in_(employee_ids)).count()
+
+def collect_errors(errors, fn, *args):
+    try:
+        fn(*args)
+    except Exception as e:
+        errors.append(e)
+
+def test_database_uses_wal():
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar().lower() == "wal"
+
+def test_readers_and_a_second_writer_while_the_write_lock_is_held(employee_ids):
+    locked, release = threading.Event(), threading.Event()
+    errors, counts = [], []
+
+    def hold_write_lock():
+        with engine.connect() as conn:
+            conn.exec_driver_sql("BEGIN EXCLUSIVE")
+            conn.execute(text("INSERT INTO attendances (employee_id, date, is_present) VALUES (:id, :day, 1)"),
+                         {"id": employee_ids[0], "day": date.today().isoformat()})
+            locked.set()
+            release.wait(JOIN_TIMEOUT)
+            conn.exec_driver_sql("COMMIT")
+
+    def read():
+        with session_scope() as session:
+            counts.append(session.query(Employee).filter(Employee.organization == ORGANIZATION).count())
+
+    def write():
+        with session_scope() as session:
+            session.add(Attendance(employee_id=employee_ids[1], date=date.today(), is_present=True))
+            session.commit()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    assert locked.wait(JOIN_TIMEOUT)
+    # The lock is still held here, so the readers finishing at all means they were not blocked
+    run_threads([threading.Thread(target=collect_errors, args=(errors, read)) for _ in range(READERS)])
+    assert holder.is_alive()
+
+    # A second writer has to wait for the lock (busy_timeout) instead of failing
+    second_writer = threading.Thread(target=collect_errors, args=(errors, write))
+    second_writer.start()
+    release.set()
+    holder.join(JOIN_TIMEOUT)
+    second_writer.join(JOIN_TIMEOUT)
+
+    assert errors == []
+    assert counts == [EMPLOYEES] * READERS
+    assert attendance_count(employee_ids) == 2
+
+def test_concurrent_attendance_saves(employee_ids):
+    first = date(date.today().year + 1, 1, 1)
+    errors = []
+
+    def save_days(writer):
+        for i in range(DAYS_PER_WRITER):
+            day = first + timedelta(days=writer * DAYS_PER_WRITER + i)
+            with session_scope() as session:
+                upsert_attendance(session, [{"employee_id": e, "date": day, "is_present": True} for e in employee_ids])
+                session.commit()
+
+    def read():
+        for _ in range(DAYS_PER_WRITER):
+            attendance_count(employee_ids)
+
+    run_threads([threading.Thread(target=collect_errors, args=(errors, save_days, w)) for w in range(WRITERS)]
+                + [threading.Thread(target=collect_errors, args=(errors, read)) for _ in range(READERS)])
+
+    assert [str(e) for e in errors] == []
+    assert attendance_count(employee_ids) == WRITERS * DAYS_PER_WRITER * EMPLOYEES
@@ -0,0 +1,28 @@
+import directory_cache
+from connection import session_scope
+from directory_cache import get_directory, invalidate_directory
+from db_setup import Employee
+
+def test_cache_keeps_only_the_most_recent_organizations(monkeypatch):
+    monkeypatch.setattr(directory_cache, "MAX_CACHED_ORGANIZATIONS", 3)
+    monkeypatch.setattr(directory_cache, "_directories", directory_cache.OrderedDict())
+    with session_scope() as session:
+        for i in range(5):
+            get_directory(session, f"Tenant {i}")
+        get_directory(session, "Tenant 2")  # most recently used again
+        get_directory(session, "Tenant 5")
+    assert list(directory_cache._directories) == ["Tenant 4", "Tenant 2", "Tenant 5"]
+
+def test_writes_reload_the_directory():
+    organization = "Directory Org"
+    with session_scope() as session:
+        assert get_directory(session, organization) == ()
+        session.add(Employee(name="New", department="QA", basic_salary=1000, organization=organization))
+        session.commit()
+        assert get_directory(session, organization) == ()  # not invalidated yet
+        invalidate_directory(organization)
+        entries = get_directory(session, organization)
+        assert [entry.name for entry in entries] == ["New"]
+        session.query(Employee).filter(Employee.organization == organization).delete()
+        session.commit()
+        invalidate_directory(organization)
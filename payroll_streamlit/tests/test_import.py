@@ -0,0 +1,82 @@
+import io
+from datetime import date
+
+import pytest
+
+import import_module
+from connection import session_scope
+from db_setup import Attendance, AttendanceMonth, Employee, Payslip
+from import_module import import_attendance, import_employees
+from payslip_ledger import get_payslips
+
+ORGANIZATION = "Import Org"
+
+@pytest.fixture(autouse=True)
+def empty_organization():
+    yield
+    with session_scope() as session:
+        ids = session.query(Employee.id).filter(Employee.organization == ORGANIZATION).scalar_subquery()
+        for model in (Payslip, Attendance, AttendanceMonth):
+            session.query(model).filter(model.employee_id.in_(ids)).delete(synchronize_session=False)
+        session.query(Employee).filter(Employee.organization == ORGANIZATION).delete()
+        session.commit()
+
+def csv(*lines):
+    return io.StringIO("\n".join(lines) + "\n")
+
+def employees():
+    with session_scope() as session:
+        return {name: (department, salary) for name, department, salary in session.query(
+            Employee.name, Employee.department, Employee.basic_salary).filter(Employee.organization == ORGANIZATION)}
+
+def test_employee_import_counts_only_real_changes(monkeypatch):
+    result = import_employees(csv("name,department,basic_salary", "Asha,QA,20000", "Ben,Ops,30000",
+                                  "Chen,HR,25000"), "staff.csv", ORGANIZATION)
+    assert (result.inserted, result.updated, result.unchanged, result.rejected) == (3, 0, 0, 0)
+    with session_scope(ORGANIZATION) as session:
+        get_payslips(session, ORGANIZATION, 2025, 3, today=date(2025, 6, 1))
+
+    marked = []
+    mark = import_module.mark_employees_dirty
+    monkeypatch.setattr(import_module, "mark_employees_dirty", lambda s, ids: marked.append(sorted(ids)) or mark(s, ids))
+    result = import_employees(csv(
+        "name,department,basic_salary",
+        "Asha,QA,21000",    # salary changed
+        "Ben,Ops,30000",    # unchanged
+        "Chen,Finance,25000",  # department changed
+        "Asha,QA,99999",    # duplicate in the same chunk
+        "Dev,QA,18000",     # new
+        "Chen,HR,1",        # duplicate in a later chunk
+    ), "staff.csv", ORGANIZATION, chunk_size=4)
+
+    assert (result.rows, result.inserted, result.updated, result.unchanged, result.rejected) == (6, 1, 2, 1, 2)
+    assert result.errors == ["Row 5: Duplicate of an earlier row in the file.",
+                             "Row 7: Duplicate of an earlier row in the file."]
+    assert employees() == {"Asha": ("QA", 21000), "Ben": ("Ops", 30000), "Chen": ("Finance", 25000),
+                           "Dev": ("QA", 18000)}
+    with session_scope() as session:
+        asha = session.query(Employee.id).filter_by(organization=ORGANIZATION, name="Asha").scalar()
+        dirty = [employee_id for (employee_id,) in session.query(Payslip.employee_id).join(Employee).filter(
+            Employee.organization == ORGANIZATION, Payslip.is_dirty.is_(True))]
+    # One call for the batch, with only the employee whose salary changed
+    assert marked == [[asha]]
+    assert dirty == [asha]
+
+def test_attendance_import_rejects_repeated_days():
+    import_employees(csv("name,department,basic_salary", "Asha,QA,20000"), "staff.csv", ORGANIZATION)
+    result = import_attendance(csv(
+        "name,date,is_present",
+        "Asha,2025-03-03,1",
+        "Asha,2025-03-03,0",   # same day, same chunk
+        "Asha,2025-03-04,1",
+        "Asha,2025-03-04,0",   # same day, next chunk
+        "Asha,2025-04-04,0",   # same day of another month
+    ), "days.csv", ORGANIZATION, chunk_size=3)
+
+    assert (result.rows, result.inserted, result.rejected) == (5, 3, 2)
+    assert result.errors == ["Row 3: Duplicate of an earlier row in the file.",
+                             "Row 5: Duplicate of an earlier row in the file."]
+    with session_scope() as session:
+        days = dict(session.query(Attendance.date, Attendance.is_present).join(Employee).filter(
+            Employee.organization == ORGANIZATION))
+    assert days == {date(2025, 3, 3): True, date(2025, 3, 4): True, date(2025, 4, 4): False}
@@ -0,0 +1,63 @@
+import os
+import shutil
+import sqlite3
+
+from sqlalchemy import inspect
+
+from connection import BASE_DIR, make_engine
+from db_setup import Base
+from setup import LATEST_VERSION, setup_database
+
+SHIPPED_DB = os.path.join(BASE_DIR, "plus2_payroll.db")
+
+def upgrade(path):
+    engine = make_engine(path, pool_size=1, max_overflow=0)
+    try:
+        version = setup_database(engine)
+        columns = {table: {column["name"] for column in inspect(engine).get_columns(table)}
+                   for table in Base.metadata.tables}
+    finally:
+        engine.dispose()
+    return version, columns
+
+def user_version(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def assert_latest_schema(columns):
+    for table in Base.metadata.sorted_tables:
+        assert columns[table.name] >= {column.name for column in table.columns}, table.name
+
+def test_upgrades_the_shipped_database(tmp_path):
+    path = str(tmp_path / "shipped.db")
+    shutil.copyfile(SHIPPED_DB, path)
+    assert user_version(path) == 0
+    with sqlite3.connect(path) as conn:
+        employees = conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    version, columns = upgrade(path)
+
+    assert version == LATEST_VERSION == user_version(path)
+    assert_latest_schema(columns)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0] == employees
+        assert conn.execute("SELECT COUNT(*) FROM payslips").fetchone()[0] == 0
+    # Running it again is a no-op
+    assert upgrade(path)[0] == LATEST_VERSION
+
+def test_upgrades_a_v0_database_without_later_tables(tmp_path):
+    path = str(tmp_path / "old.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE employees (id INTEGER PRIMARY KEY, name VARCHAR, department VARCHAR, "
+                     "basic_salary FLOAT, organization VARCHAR)")
+        conn.execute("CREATE TABLE attendances (id INTEGER PRIMARY KEY, employee_id INTEGER, date DATE, "
+                     "is_present BOOLEAN)")
+        conn.execute("INSERT INTO employees VALUES (1, 'A', 'QA', 20000, 'Old Org')")
+        conn.execute("INSERT INTO attendances VALUES (1, 1, '2026-09-01', 1)")
+
+    version, columns = upgrade(path)
+
+    assert version == LATEST_VERSION == user_version(path)
+    assert_latest_schema(columns)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM attendance_months").fetchone()[0] == 1
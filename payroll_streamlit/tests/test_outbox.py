@@ -0,0 +1,137 @@
+import socket
+import threading
+
+import pytest
+
+from connection import session_scope
+from db_setup import ContactMessage
+from outbox import OutboxWorker, SmtpConfig, get_outbox_worker, smtp_config_from_env
+from smtp_stand_in import start_server
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    with session_scope() as session:
+        session.query(ContactMessage).delete()
+        session.commit()
+
+@pytest.fixture
+def smtp_server():
+    server = start_server(reject_first=2)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_worker(server, **kwargs):
+    config = SmtpConfig(
+        host="127.0.0.1", port=server.server_address[1], use_ssl=False,
+        username=None, password=None, sender="payroll@example.com", receiver="hr@example.com",
+    )
+    return OutboxWorker(config=config, **kwargs)
+
+def queue_messages(count):
+    """What contact_page does on submit, without waking a worker."""
+    with session_scope() as session:
+        session.add_all([
+            ContactMessage(name=f"Visitor {i}", email=f"visitor{i}@example.com", message="Hello")
+            for i in range(count)
+        ])
+        session.commit()
+
+def message_rows():
+    with session_scope() as session:
+        return session.query(ContactMessage.status, ContactMessage.attempts).order_by(ContactMessage.id).all()
+
+def test_queueing_does_not_send(smtp_server):
+    make_worker(smtp_server)
+    queue_messages(3)
+    assert smtp_server.connections == 0
+    assert [status for status, _ in message_rows()] == ["pending"] * 3
+
+def test_batch_shares_a_connection_and_retries_rejected_messages(smtp_server):
+    worker = make_worker(smtp_server, batch_size=10, backoff_seconds=0)
+    queue_messages(10)
+
+    assert worker.drain() == 12  # ten first attempts plus two retries
+    assert len(smtp_server.delivered) == 10
+    # one connection for the batch, one for the retry batch
+    assert smtp_server.connections == 2
+    rows = message_rows()
+    assert [status for status, _ in rows] == ["sent"] * 10
+    assert sorted(attempts for _, attempts in rows) == [1] * 8 + [2] * 2
+
+def test_gives_up_after_max_attempts(smtp_server):
+    smtp_server.reject_remaining = 100
+    worker = make_worker(smtp_server, max_attempts=3, backoff_seconds=0)
+    queue_messages(1)
+
+    worker.drain()
+    assert message_rows() == [("failed", 3)]
+    assert smtp_server.delivered == []
+
+def test_rejected_message_waits_for_backoff(smtp_server):
+    worker = make_worker(smtp_server, backoff_seconds=3600)
+    queue_messages(3)
+
+    assert worker.drain() == 3
+    assert sorted(status for status, _ in message_rows()) == ["pending", "pending", "sent"]
+    assert worker.drain() == 0
+
+def test_notify_wakes_the_worker(smtp_server):
+    smtp_server.reject_remaining = 0
+    worker = make_worker(smtp_server, poll_interval=3600)
+    delivered = threading.Event()
+    drain = worker.drain
+    worker.drain = lambda: drain() and delivered.set()
+    worker.start()
+    try:
+        queue_messages(1)
+        worker.notify()
+        assert delivered.wait(30)
+    finally:
+        worker.stop(timeout=5)
+    assert message_rows() == [("sent", 1)]
+
+def test_sending_is_disabled_without_smtp_settings(monkeypatch):
+    for name in ("PAYROLL_SMTP_SENDER", "PAYROLL_SMTP_RECEIVER", "PAYROLL_SMTP_PASSWORD"):
+        monkeypatch.delenv(name, raising=False)
+    assert smtp_config_from_env() is None
+    assert get_outbox_worker() is None
+    with pytest.raises(ValueError):
+        OutboxWorker()
+
+def unreachable_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def count_connects(worker):
+    calls = []
+    connect = worker._connect
+    worker._connect = lambda: calls.append(1) or connect()
+    return calls
+
+def test_unreachable_server_stops_the_batch_after_one_connect(smtp_server):
+    worker = make_worker(smtp_server, batch_size=10, backoff_seconds=3600)
+    worker.config = worker.config._replace(port=unreachable_port())
+    connects = count_connects(worker)
+    queue_messages(5)
+
+    assert worker.drain() == 0
+    assert worker.drain() == 0  # still backing off: no new connect
+    assert len(connects) == 1
+    with session_scope() as session:
+        rows = session.query(ContactMessage).all()
+        assert [(msg.status, msg.attempts) for msg in rows] == [("pending", 0)] * 5
+        assert len({msg.next_attempt_at for msg in rows}) == 1 and all(msg.last_error for msg in rows)
+
+def test_worker_recovers_when_the_server_is_back(smtp_server):
+    smtp_server.reject_remaining = 0
+    worker = make_worker(smtp_server, backoff_seconds=0)
+    reachable = worker.config
+    worker.config = reachable._replace(port=unreachable_port())
+    queue_messages(3)
+
+    assert worker.drain() == 0
+    worker.config = reachable
+    assert worker.drain() == 3
+    assert message_rows() == [("sent", 1)] * 3
@@ -0,0 +1,129 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from attendance_module import upsert_attendance
+from connection import session_scope
+from db_setup import Attendance, AttendanceMonth, Employee
+from payroll_engine import compute_payslips, run_payroll
+from salary_rules import DEFAULT_RULES, compile_rules
+from workday_calendar import build_month
+
+YEAR, MONTH = 2025, 2  # 24 workdays (Monday to Saturday)
+CURRENT = date(2025, 2, 10)
+COMPLETED = date(2025, 6, 1)
+COMPARED = ['days_present', 'total_workdays', 'attendance_percentage', 'basic_pay', 'hra', 'da', 'bonus',
+            'gross_salary', 'penalty_applied', 'penalty_amount', 'deductions', 'tax', 'net_salary']
+
+def baseline_payslip(basic_salary, days_present, total_workdays, is_past_month):
+    """The payslip page's formula before the engine and salary rules existed."""
+    attendance_percentage = (days_present / total_workdays) * 100 if total_workdays > 0 else 0
+    attendance_ratio = days_present / total_workdays if total_workdays > 0 else 0
+    basic_pay = basic_salary * attendance_ratio
+    hra = 0.20 * basic_pay
+    da = 0.10 * basic_pay
+    bonus = 0.05 * basic_salary if attendance_percentage >= 95 else 0
+    gross_salary = basic_pay + hra + da + bonus
+    penalty_amount = 0
+    if is_past_month and attendance_percentage < 75:
+        penalty_amount = 0.30 * gross_salary
+        gross_salary -= penalty_amount
+    if gross_salary <= 15000:
+        tax = 0
+    elif gross_salary <= 30000:
+        tax = 0.05 * gross_salary
+    else:
+        tax = 0.10 * gross_salary
+    return {
+        'days_present': days_present, 'total_workdays': total_workdays,
+        'attendance_percentage': attendance_percentage, 'basic_pay': basic_pay, 'hra': hra, 'da': da,
+        'bonus': bonus, 'gross_salary': gross_salary,
+        'penalty_applied': is_past_month and attendance_percentage < 75, 'penalty_amount': penalty_amount,
+        'deductions': 0, 'tax': tax, 'net_salary': gross_salary - tax,
+    }
+
+def assert_matches_baseline(cases, today, workdays=None, rules=None):
+    """`cases` are (basic_salary, days_present); compares every component exactly."""
+    employees = pd.DataFrame({
+        'employee_id': range(1, len(cases) + 1), 'name': 'E', 'department': 'D',
+        'basic_salary': [basic_salary for basic_salary, _ in cases],
+    })
+    days_present = pd.Series([days for _, days in cases], index=employees['employee_id'])
+    kwargs = {'rules': rules} if rules is not None else {}
+    payslips = compute_payslips(employees, days_present, YEAR, MONTH, today=today, workdays=workdays, **kwargs)
+    total_workdays = (workdays or build_month(YEAR, MONTH)).total_workdays
+    is_past_month = today > date(YEAR, MONTH, 28)
+    for row, (basic_salary, days) in zip(payslips.to_dict('records'), cases):
+        expected = baseline_payslip(basic_salary, days, total_workdays, is_past_month)
+        assert {c: row[c] for c in COMPARED} == expected, (basic_salary, days)
+    return payslips
+
+def edge_salaries(gross_edge, days, total_workdays):
+    """Basic salaries whose baseline gross lands just below, on or just above `gross_edge`."""
+    centre = gross_edge / baseline_payslip(1.0, days, total_workdays, False)['gross_salary']
+    below, above = np.float64(centre), np.float64(centre)
+    salaries = [float(centre), round(centre, 2), round(centre, 2) + 0.01, round(centre, 2) - 0.01]
+    for _ in range(8):
+        below, above = np.nextafter(below, 0), np.nextafter(above, np.inf)
+        salaries += [float(below), float(above)]
+    return salaries
+
+@pytest.mark.parametrize("rules", [None, compile_rules(DEFAULT_RULES), compile_rules({})],
+                         ids=["default", "explicit defaults", "empty rule set"])
+@pytest.mark.parametrize("today", [CURRENT, COMPLETED], ids=["running month", "completed month"])
+def test_default_rules_reproduce_the_baseline_formula(rules, today):
+    cases = [(salary, days) for salary in (0, 5000, 12345.67, 20000, 40000, 99999.5) for days in range(25)]
+    assert_matches_baseline(cases, today, rules=rules)
+
+@pytest.mark.parametrize("gross_edge", [15000, 30000])
+@pytest.mark.parametrize("days", [24, 20, 12])
+def test_tax_slab_edges(gross_edge, days):
+    salaries = edge_salaries(gross_edge, days, 24)
+    payslips = assert_matches_baseline([(salary, days) for salary in salaries], CURRENT)
+    # Both sides of the edge were exercised
+    assert (payslips['gross_salary'] <= gross_edge).any() and (payslips['gross_salary'] > gross_edge).any()
+
+def test_attendance_boundaries():
+    # With four holidays February has 20 workdays: 19 is exactly 95 %, 15 exactly 75 %
+    holidays = build_month(YEAR, MONTH, 0b1111 << 2)
+    assert holidays.total_workdays == 20
+    for today in (CURRENT, COMPLETED):
+        payslips = assert_matches_baseline([(30000, days) for days in (14, 15, 18, 19, 20)], today, workdays=holidays)
+        assert payslips['bonus'].gt(0).tolist() == [False, False, False, True, True]
+        assert payslips['penalty_applied'].tolist() == [today == COMPLETED, False, False, False, False]
+    # 18 of 24 workdays is exactly 75 %: no penalty; 17 is below it
+    payslips = assert_matches_baseline([(30000, 17), (30000, 18), (30000, 23), (30000, 22)], COMPLETED)
+    assert payslips['penalty_applied'].tolist() == [True, False, False, False]
+    assert payslips['bonus'].gt(0).tolist() == [False, False, True, False]
+
+def test_run_payroll_matches_the_baseline_on_stored_attendance():
+    organization = "Engine Org"
+    presence = [0.0, 0.5, 0.74, 0.76, 0.94, 0.96, 1.0]
+    with session_scope() as session:
+        employees = [Employee(name=f"E{i}", department="D", basic_salary=10000 + 7919.5 * i, organization=organization)
+                     for i in range(len(presence))]
+        session.add_all(employees)
+        session.commit()
+        ids = [employee.id for employee in employees]
+        # Present on the first share of each month's days, Sundays included
+        upsert_attendance(session, [
+            {"employee_id": e, "date": date(YEAR, MONTH, day), "is_present": day <= round(share * 28)}
+            for e, share in zip(ids, presence) for day in range(1, 29)
+        ])
+        session.commit()
+        try:
+            for today in (CURRENT, COMPLETED):
+                payslips = run_payroll(session, organization, YEAR, MONTH, today=today).set_index('employee_id')
+                for employee in employees:
+                    days = sum(1 for (present_day,) in session.query(Attendance.date).filter(
+                        Attendance.employee_id == employee.id, Attendance.is_present.is_(True))
+                        if present_day.weekday() < 6)
+                    expected = baseline_payslip(employee.basic_salary, days, 24, today == COMPLETED)
+                    assert {c: payslips.loc[employee.id, c] for c in COMPARED} == expected
+        finally:
+            for model in (Attendance, AttendanceMonth):
+                session.query(model).filter(model.employee_id.in_(ids)).delete()
+            session.query(Employee).filter(Employee.id.in_(ids)).delete()
+            session.commit()
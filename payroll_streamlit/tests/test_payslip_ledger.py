@@ -0,0 +1,88 @@
+import calendar
+import threading
+from datetime import date
+
+import pytest
+
+import payslip_ledger
+from attendance_module import upsert_attendance
+from connection import session_scope
+from db_setup import Attendance, Employee, Payslip
+from payroll_engine import run_payroll
+from payslip_ledger import get_payslips, reserve_payslips, store_payslips
+
+ORGANIZATION = "Ledger Org"
+YEAR, MONTH = 2025, 3
+TODAY = date(2025, 6, 1)
+
+@pytest.fixture
+def employee_id():
+    with session_scope() as session:
+        employee = Employee(name="Racer", department="QA", basic_salary=30000, organization=ORGANIZATION)
+        session.add(employee)
+        session.commit()
+        employee_id = employee.id
+    yield employee_id
+    with session_scope() as session:
+        session.query(Payslip).filter(Payslip.employee_id == employee_id).delete()
+        session.query(Attendance).filter(Attendance.employee_id == employee_id).delete()
+        session.query(Employee).filter(Employee.id == employee_id).delete()
+        session.commit()
+
+def mark_whole_month_present(employee_id):
+    """Another user's attendance save, committed from its own thread and session."""
+    def save():
+        with session_scope(ORGANIZATION) as session:
+            upsert_attendance(session, [
+                {"employee_id": employee_id, "date": date(YEAR, MONTH, day), "is_present": True}
+                for day in range(1, calendar.monthrange(YEAR, MONTH)[1] + 1)
+            ])
+            session.commit()
+    writer = threading.Thread(target=save)
+    writer.start()
+    writer.join(60)
+    assert not writer.is_alive()
+
+def stored_row(employee_id):
+    with session_scope() as session:
+        return session.query(Payslip.days_present, Payslip.total_workdays, Payslip.is_dirty).filter_by(
+            employee_id=employee_id, year=YEAR, month=MONTH).one()
+
+def days_present(employee_id):
+    with session_scope(ORGANIZATION) as session:
+        payslips = get_payslips(session, ORGANIZATION, YEAR, MONTH, employee_ids=[employee_id], today=TODAY)
+    return int(payslips['days_present'].iloc[0]), int(payslips['total_workdays'].iloc[0])
+
+def test_write_during_first_computation_keeps_the_payslip_dirty(employee_id, monkeypatch):
+    def racing_run_payroll(*args, **kwargs):
+        payslips = run_payroll(*args, **kwargs)
+        mark_whole_month_present(employee_id)
+        return payslips
+    monkeypatch.setattr(payslip_ledger, "run_payroll", racing_run_payroll)
+
+    # The racing call itself may return the attendance it read before the write
+    assert days_present(employee_id)[0] == 0
+    assert stored_row(employee_id).is_dirty
+
+    monkeypatch.setattr(payslip_ledger, "run_payroll", run_payroll)
+    present, workdays = days_present(employee_id)
+    assert present == workdays > 0
+    assert stored_row(employee_id) == (present, workdays, False)
+
+def test_write_during_a_stored_run_keeps_the_payslip_dirty(employee_id):
+    with session_scope(ORGANIZATION) as session:
+        generations = reserve_payslips(session, ORGANIZATION, YEAR, MONTH, today=TODAY)
+        assert generations[employee_id] == 0
+        payslips = run_payroll(session, ORGANIZATION, YEAR, MONTH, employee_ids=[employee_id], today=TODAY)
+        mark_whole_month_present(employee_id)
+        store_payslips(session, payslips, YEAR, MONTH, today=TODAY, generations=generations)
+
+    assert stored_row(employee_id).is_dirty
+    present, workdays = days_present(employee_id)
+    assert present == workdays > 0
+
+def test_first_computation_stores_a_clean_payslip(employee_id):
+    mark_whole_month_present(employee_id)
+    present, workdays = days_present(employee_id)
+    assert present == workdays > 0
+    assert stored_row(employee_id) == (present, workdays, False)
@@ -0,0 +1,120 @@
+"""Workday calendar shared by the pages and every payroll path.
+
+Monday to Saturday are payable workdays unless the organization has declared
+the day a holiday. A month is described by a MonthCalendar whose masks use the
+same bit layout as the attendance bitmaps (bit d - 1 is day d), so present
+workdays are `popcount(present_mask & workday_mask)`.
+
+Month calendars are built once per (year, month, holidays) and kept in an LRU
+cache. An organization's holidays are read in one query and kept until they
+change (see invalidate_holidays).
+"""
+import calendar
+import os
+import threading
+from collections import OrderedDict, defaultdict, namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+from cache_versions import bump_version, current_version
+from db_setup import Holiday
+
+HOLIDAY_SCOPE = "holidays"
+CALENDAR_CACHE_SIZE = int(os.environ.get("PAYROLL_CALENDAR_CACHE_SIZE", "1024"))
+MAX_CACHED_ORGANIZATIONS = 256
+
+MonthCalendar = namedtuple("MonthCalendar", [
+    "year", "month", "days_in_month", "workday_mask", "holiday_mask", "total_workdays",
+])
+
+@lru_cache(maxsize=CALENDAR_CACHE_SIZE)
+def build_month(year, month, holiday_mask=0):
+    """The MonthCalendar of a month with the given holidays (a day bitmask)."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    first_weekday = date(year, month, 1).weekday()
+    weekdays = 0
+    for day in range(days_in_month):
+        if (first_weekday + day) % 7 < 6:  # Monday to Saturday
+            weekdays |= 1 << day
+    workdays = weekdays & ~holiday_mask
+    return MonthCalendar(year, month, days_in_month, workdays, holiday_mask, bin(workdays).count("1"))
+
+@lru_cache(maxsize=CALENDAR_CACHE_SIZE)
+def calendar_weeks(year, month):
+    """The month as weeks of dates starting on Sunday, padded with the
+    neighbouring months' days like calendar.Calendar.itermonthdates."""
+    start = date(year, month, 1)
+    start -= timedelta(days=(start.weekday() + 1) % 7)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    end += timedelta(days=(5 - end.weekday()) % 7)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return tuple(tuple(days[i:i + 7]) for i in range(0, len(days), 7))
+
+def is_workday(month_calendar, day):
+    return bool(month_calendar.workday_mask >> (day.day - 1) & 1)
+
+def is_holiday(month_calendar, day):
+    return bool(month_calendar.holiday_mask >> (day.day - 1) & 1)
+
+_lock = threading.Lock()
+_holidays = OrderedDict()  # organization -> (version, {(year, month): holiday_mask})
+
+def holiday_masks(session, organization):
+    """{(year, month): holiday bitmask} of an organization, from memory when unchanged."""
+    version = current_version(HOLIDAY_SCOPE, organization)
+    with _lock:
+        cached = _holidays.get(organization)
+        if cached is not None and cached[0] == version:
+            _holidays.move_to_end(organization)
+            return cached[1]
+
+    masks = defaultdict(int)
+    for (day,) in session.query(Holiday.date).filter(Holiday.organization == organization):
+        masks[(day.year, day.month)] |= 1 << (day.day - 1)
+    masks = dict(masks)
+    with _lock:
+        _holidays[organization] = (version, masks)
+        _holidays.move_to_end(organization)
+        while len(_holidays) > MAX_CACHED_ORGANIZATIONS:
+            _holidays.popitem(last=False)
+    return masks
+
+def month_calendar(session, organization, year, month):
+    """The organization's MonthCalendar for one month."""
+    return build_month(year, month, holiday_masks(session, organization).get((year, month), 0))
+
+def month_calendars(session, organization, months):
+    """{(year, month): MonthCalendar} for several months with one holiday lookup."""
+    masks = holiday_masks(session, organization)
+    return {(year, month): build_month(year, month, masks.get((year, month), 0)) for year, month in months}
+
+def list_holidays(session, organization, year=None, month=None):
+    query = session.query(Holiday).filter(Holiday.organization == organization)
+    if year is not None:
+        first = date(year, month or 1, 1)
+        last = date(year, month or 12, calendar.monthrange(year, month or 12)[1])
+        query = query.filter(Holiday.date.between(first, last))
+    return query.order_by(Holiday.date).all()
+
+def add_holiday(session, organization, day, name):
+    """Declare (or rename) a holiday. Nothing is committed; stored payslips of the
+    month need to be marked dirty and invalidate_holidays called after commit."""
+    holiday = session.query(Holiday).filter_by(organization=organization, date=day).first()
+    if holiday is None:
+        session.add(Holiday(organization=organization, date=day, name=name))
+    else:
+        holiday.name = name
+    session.flush()
+
+def delete_holiday(session, organization, day):
+    """Remove a holiday; returns whether one existed. Same contract as add_holiday."""
+    return session.query(Holiday).filter_by(organization=organization, date=day).delete() > 0
+
+def invalidate_holidays(organization):
+    bump_version(HOLIDAY_SCOPE, organization)
+
+def clear_holiday_cache():
+    """Forget every organization's holidays, for processes that cannot see the
+    version bumps of the process that changed them (e.g. the API server)."""
+    with _lock:
+        _holidays.clear()